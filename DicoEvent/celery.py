@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,3 +10,20 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "DicoEvent.settings")
 app = Celery("DicoEvent")
 app.conf.broker_url = os.getenv("CELERY_BROKER_URL")
 app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    # jendela geser + ledger: tick yang telat/ganda tidak melewatkan atau menggandakan email
+    "send-event-reminders": {
+        "task": "events.tasks.send_event_reminders",
+        "schedule": crontab(),
+    },
+    # cadangan untuk retry dengan backoff; enqueue sendiri memicu drain setelah commit
+    "drain-email-outbox": {
+        "task": "events.tasks.drain_email_outbox",
+        "schedule": crontab(),
+    },
+    "collect-orphan-poster-blobs": {
+        "task": "events.tasks.collect_orphan_blobs",
+        "schedule": crontab(minute=0),
+    },
+}
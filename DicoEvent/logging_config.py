@@ -3,11 +3,23 @@ from loguru import logger
 
 logger.remove()
 
-logger.add(sys.stdout, format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {message}", level="INFO")
+
+def _not_request(record):
+    # log timing per request hanya masuk ke logs/requests.log
+    return record["extra"].get("kind") != "request"
+
+
+logger.add(
+    sys.stdout,
+    format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {message}",
+    filter=_not_request,
+    level="INFO",
+)
 
 logger.add(
     "logs/application.log",
     format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {message}",
+    filter=_not_request,
     rotation="1 day",
     level="INFO",
     enqueue=True,
@@ -16,9 +28,20 @@ logger.add(
 logger.add(
     "logs/error.log",
     format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {message}",
+    filter=_not_request,
     rotation="1 day",
     level="ERROR",
     enqueue=True,
 )
 
+# satu baris JSON per request dari RequestTimingMiddleware
+logger.add(
+    "logs/requests.log",
+    format="{message}",
+    filter=lambda record: record["extra"].get("kind") == "request",
+    rotation="1 day",
+    level="INFO",
+    enqueue=True,
+)
+
 app_logger = logger
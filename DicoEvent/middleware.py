@@ -0,0 +1,72 @@
+import json
+import re
+import time
+import uuid
+
+from django.db import connection
+
+from DicoEvent.logging_config import app_logger
+
+REQUEST_ID_HEADER = "X-Request-ID"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+SLOW_REQUEST_MS = 500
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` that counts and times every SQL query."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # request ID dari proxy dipakai ulang bila formatnya aman
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        request.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+        db_ms = timer.duration * 1000
+
+        # hanya view yang memakai cache mengisi X-Data-Source; endpoint lain dicatat null
+        cache_status = {"cache": "hit", "db": "miss"}.get(response.get("X-Data-Source"))
+        size = None if response.streaming else len(response.content)
+
+        timings = [f"app;dur={duration_ms:.1f}", f'db;dur={db_ms:.1f};desc="{timer.count} queries"']
+        if cache_status:
+            timings.append(f"cache;desc={cache_status}")
+        response["Server-Timing"] = ", ".join(timings)
+        response[REQUEST_ID_HEADER] = request.request_id
+
+        match = request.resolver_match
+        record = {
+            "request_id": request.request_id,
+            "method": request.method,
+            "path": request.path,
+            "route": match.route if match else None,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": timer.count,
+            "db_ms": round(db_ms, 2),
+            "cache": cache_status,
+            "response_bytes": size,
+        }
+        level = "WARNING" if duration_ms >= SLOW_REQUEST_MS else "INFO"
+        app_logger.bind(kind="request").log(level, json.dumps(record))
+        return response
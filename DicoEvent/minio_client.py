@@ -1,19 +1,77 @@
-import io
-import mimetypes
 import os
+from datetime import datetime, timedelta, timezone
+
+import urllib3
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
 from minio import Minio
+from minio.datatypes import PostPolicy
 from dotenv import load_dotenv
 
 load_dotenv()
 
-minio_client = Minio(
-    os.environ.get("MINIO_ENDPOINT_URL"),
-    access_key=os.environ.get("MINIO_ACCESS_KEY"),
-    secret_key=os.environ.get("MINIO_SECRET_KEY"),
-    secure=False
-)
+MINIO_ENDPOINT_URL = os.environ.get("MINIO_ENDPOINT_URL")
+MINIO_SECURE = os.environ.get("MINIO_SECURE", "false").lower() == "true"
+# region diisi agar presign tidak perlu request GetBucketLocation
+MINIO_REGION = os.environ.get("MINIO_REGION", "us-east-1")
+MINIO_POOL_SIZE = int(os.environ.get("MINIO_POOL_SIZE", 10))
+MINIO_TIMEOUT = urllib3.Timeout(connect=2, read=30)
 
 BUCKET_NAME = os.environ.get("MINIO_BUCKET_NAME", "media")
+BUCKET_READY_KEY = f"minio:bucket:{BUCKET_NAME}:ready"
+BUCKET_READY_TIMEOUT = 24 * 3600
+
+UPLOAD_URL_EXPIRY = timedelta(minutes=10)
+
+
+def create_minio_client():
+    http_client = urllib3.PoolManager(
+        maxsize=MINIO_POOL_SIZE,
+        block=False,
+        timeout=MINIO_TIMEOUT,
+        retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
+    return Minio(
+        MINIO_ENDPOINT_URL,
+        access_key=os.environ.get("MINIO_ACCESS_KEY"),
+        secret_key=os.environ.get("MINIO_SECRET_KEY"),
+        secure=MINIO_SECURE,
+        region=MINIO_REGION,
+        http_client=http_client,
+    )
+
+
+# dibuat saat pertama dipakai (setelah fork worker), import tidak menyentuh jaringan
+minio_client = SimpleLazyObject(create_minio_client)
+
+_bucket_ready = False
+
+
+def ensure_bucket(force=False):
+    """Create the bucket if needed; checked once per process and shared through the cache."""
+    global _bucket_ready
+    if _bucket_ready and not force:
+        return
+    if force or not cache.get(BUCKET_READY_KEY):
+        if not minio_client.bucket_exists(BUCKET_NAME):
+            minio_client.make_bucket(BUCKET_NAME)
+        cache.set(BUCKET_READY_KEY, True, timeout=BUCKET_READY_TIMEOUT)
+    _bucket_ready = True
+
+
+def presigned_upload(object_name, content_type, max_size):
+    # form POST langsung ke MinIO; ukuran dan content-type dibatasi oleh policy
+    ensure_bucket()
+    policy = PostPolicy(BUCKET_NAME, datetime.now(timezone.utc) + UPLOAD_URL_EXPIRY)
+    policy.add_equals_condition("key", object_name)
+    policy.add_equals_condition("Content-Type", content_type)
+    policy.add_content_length_range_condition(1, max_size)
 
-if not minio_client.bucket_exists(BUCKET_NAME):
-    minio_client.make_bucket(BUCKET_NAME)
\ No newline at end of file
+    fields = minio_client.presigned_post_policy(policy)
+    fields["key"] = object_name
+    fields["Content-Type"] = content_type
+    return {
+        "url": f"{'https' if MINIO_SECURE else 'http'}://{MINIO_ENDPOINT_URL}/{BUCKET_NAME}",
+        "fields": fields,
+        "expires_in": int(UPLOAD_URL_EXPIRY.total_seconds()),
+    }
@@ -0,0 +1,208 @@
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from users.roles import has_role
+from .inventory import SoldOut, reserve
+from .models import Event, Registration, Ticket
+from .serializers import EventSerializer, RegistrationSerializer, TicketSerializer
+from .waiting_room import get_queue_config
+
+BULK_MAX_ITEMS = 500
+
+
+def _failed(index, errors):
+    return {"index": index, "status": "failed", "errors": errors}
+
+
+def bulk_register(data):
+    """Validate and insert a list of registrations; return one result per item, in order."""
+    # validasi per item agar item yang valid tetap diproses
+    child = RegistrationSerializer(many=True).child
+    results = [None] * len(data)
+    validated = {}
+    for index, item in enumerate(data):
+        try:
+            validated[index] = child.run_validation(item)
+        except ValidationError as e:
+            results[index] = _failed(index, e.detail)
+
+    ticket_ids = {item["ticket_id"] for item in validated.values()}
+    tickets = {
+        ticket.id: ticket
+        for ticket in Ticket.objects.select_related("event")
+        .only("id", "quota", "event__id", "event__quota")
+        .filter(id__in=ticket_ids)
+    }
+
+    user_ids = set(
+        get_user_model().objects.filter(
+            id__in={item["user_id"] for item in validated.values()}
+        ).values_list("id", flat=True)
+    )
+
+    by_ticket = defaultdict(list)
+    for index, item in validated.items():
+        ticket = tickets.get(item["ticket_id"])
+        if ticket is None:
+            results[index] = _failed(index, {"ticket_id": ["Ticket not found."]})
+            continue
+        if item["user_id"] not in user_ids:
+            results[index] = _failed(index, {"user_id": ["User not found."]})
+            continue
+        config = get_queue_config(ticket.id)
+        if config and config[0]:
+            results[index] = _failed(index, {"ticket_id": ["Ticket is in queue mode, register individually."]})
+            continue
+        by_ticket[ticket.id].append(index)
+
+    created = []
+    with ExitStack() as stack:
+        # kuota dicek sekali per tiket untuk seluruh batch; urutan tetap agar lock tidak deadlock
+        for ticket_id in sorted(by_ticket, key=lambda i: (str(tickets[i].event_id), str(i))):
+            indexes = by_ticket[ticket_id]
+            try:
+                stack.enter_context(reserve(tickets[ticket_id], quantity=len(indexes)))
+            except SoldOut:
+                for index in indexes:
+                    results[index] = _failed(index, {"ticket_id": ["Ticket is sold out."]})
+                continue
+            for index in indexes:
+                item = validated[index]
+                created.append((index, Registration(user_id=item["user_id"], ticket_id=item["ticket_id"])))
+
+        with transaction.atomic():
+            Registration.objects.bulk_create([registration for _, registration in created])
+
+    for index, registration in created:
+        results[index] = {
+            "index": index,
+            "status": "created",
+            "registration": RegistrationSerializer(registration).data,
+        }
+    return results
+
+
+# =========================================================
+# TICKET & EVENT (all-or-nothing)
+# =========================================================
+def _is_admin(request):
+    return request.user.is_superuser or has_role(request, "admin")
+
+
+def _validate_create(serializer_class, data):
+    child = serializer_class(many=True).child
+    validated, errors = [], []
+    for item in data:
+        try:
+            validated.append(child.run_validation(item))
+            errors.append({})
+        except ValidationError as e:
+            errors.append(e.detail)
+    if any(errors):
+        raise ValidationError({"errors": errors})
+    return validated
+
+
+def _validate_update(serializer_class, model, data):
+    ids = []
+    for item in data:
+        try:
+            ids.append(uuid.UUID(str(item.get("id"))))
+        except (AttributeError, ValueError):
+            ids.append(None)
+    instances = model.objects.in_bulk([i for i in ids if i])
+
+    validated, errors = [], []
+    for item, instance_id in zip(data, ids):
+        instance = instances.get(instance_id)
+        if instance is None:
+            errors.append({"id": ["Not found."]})
+            continue
+        serializer = serializer_class(instance, data=item, partial=True)
+        if serializer.is_valid():
+            validated.append((instance, serializer.validated_data))
+            errors.append({})
+        else:
+            errors.append(serializer.errors)
+    if any(errors):
+        raise ValidationError({"errors": errors})
+    return validated
+
+
+def _check_events(request, event_ids):
+    # kepemilikan dicek sekali untuk seluruh batch
+    organizers = dict(Event.objects.filter(id__in=event_ids).values_list("id", "organizer_id"))
+    missing = set(event_ids) - set(organizers)
+    if missing:
+        raise ValidationError({"event_id": [f"Event {event_id} not found." for event_id in missing]})
+    if not _is_admin(request) and any(o != request.user.id for o in organizers.values()):
+        raise PermissionDenied("You can only manage tickets of your own events.")
+
+
+def _check_organizers(request, organizer_ids):
+    if not _is_admin(request) and any(o != request.user.id for o in organizer_ids):
+        raise PermissionDenied("You can only manage your own events.")
+
+
+def _apply(validated):
+    fields = set()
+    for instance, values in validated:
+        for attr, value in values.items():
+            setattr(instance, attr, value)
+        fields.update(values)
+    return [instance for instance, _ in validated], sorted(fields)
+
+
+def bulk_create_tickets(request, data):
+    validated = _validate_create(TicketSerializer, data)
+    _check_events(request, {item["event_id"] for item in validated})
+
+    tickets = [Ticket(**item) for item in validated]
+    with transaction.atomic():
+        Ticket.objects.bulk_create(tickets)
+    return tickets
+
+
+def bulk_update_tickets(request, data):
+    """Return ``(tickets, previous)`` where ``previous`` maps id to the old (event_id, quota)."""
+    validated = _validate_update(TicketSerializer, Ticket, data)
+    previous = {instance.id: (instance.event_id, instance.quota) for instance, _ in validated}
+    event_ids = {event_id for event_id, _ in previous.values()}
+    event_ids.update(values["event_id"] for _, values in validated if "event_id" in values)
+    _check_events(request, event_ids)
+
+    tickets, fields = _apply(validated)
+    if fields:
+        with transaction.atomic():
+            Ticket.objects.bulk_update(tickets, fields)
+    return tickets, previous
+
+
+def bulk_create_events(request, data):
+    validated = _validate_create(EventSerializer, data)
+    _check_organizers(request, {item["organizer_id"] for item in validated})
+
+    events = [Event(**item) for item in validated]
+    with transaction.atomic():
+        Event.objects.bulk_create(events)
+    return events
+
+
+def bulk_update_events(request, data):
+    """Return ``(events, previous_quota)`` keyed by event id."""
+    validated = _validate_update(EventSerializer, Event, data)
+    organizer_ids = {instance.organizer_id for instance, _ in validated}
+    organizer_ids.update(values["organizer_id"] for _, values in validated if "organizer_id" in values)
+    _check_organizers(request, organizer_ids)
+
+    previous_quota = {instance.id: instance.quota for instance, _ in validated}
+    events, fields = _apply(validated)
+    if fields:
+        with transaction.atomic():
+            Event.objects.bulk_update(events, fields)
+    return events, previous_quota
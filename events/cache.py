@@ -0,0 +1,243 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from DicoEvent.logging_config import app_logger
+
+CACHE_TIMEOUT = 3600
+EVENT_LIST_TIMEOUT = 300
+LOCAL_CACHE_SIZE = 1024
+LOCAL_CACHE_TIMEOUT = 5  # detik, batas basi bila pesan invalidasi terlewat
+INVALIDATION_CHANNEL = "dicoevent:cache-invalidation"
+STALE_TIMEOUT = 300  # data basi masih boleh disajikan selama refresh berjalan
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+EARLY_EXPIRY_BETA = 1.0
+
+
+# =========================================================
+# STAMPEDE PROTECTION
+# =========================================================
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float  # epoch, kedaluwarsa logis (sebelum TTL Redis)
+    delta: float  # lama loader berjalan, untuk early expiry
+
+
+def _should_refresh(entry):
+    # early probabilistic expiry (XFetch): makin mahal loader, makin awal di-refresh
+    jitter = entry.delta * EARLY_EXPIRY_BETA * -math.log(1.0 - random.random())
+    return time.time() + jitter >= entry.expires_at
+
+
+def _refresh(key, loader, timeout):
+    started = time.monotonic()
+    value = loader()
+    entry = CacheEntry(value, time.time() + timeout, time.monotonic() - started)
+    cache.set(key, entry, timeout=timeout + STALE_TIMEOUT)
+    return value
+
+
+def _refresh_locked(key, loader, timeout):
+    # single-flight: hanya pemegang lock yang menjalankan loader
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        return None, False
+    try:
+        return _refresh(key, loader, timeout), True
+    finally:
+        cache.delete(lock_key)
+
+
+def _fetch_shared(key, loader, timeout):
+    entry = cache.get(key)
+    if isinstance(entry, CacheEntry):
+        if not _should_refresh(entry):
+            return entry.value, True
+        value, refreshed = _refresh_locked(key, loader, timeout)
+        if refreshed:
+            return value, False
+        # worker lain sedang refresh, sajikan data lama
+        return entry.value, True
+
+    value, refreshed = _refresh_locked(key, loader, timeout)
+    if refreshed:
+        return value, False
+
+    # key kosong dan worker lain sedang mengisi, tunggu hasilnya
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, CacheEntry):
+            return entry.value, True
+    return loader(), False
+
+
+# =========================================================
+# IN-PROCESS LRU (tier 1)
+# =========================================================
+class LocalCache:
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TIMEOUT)
+_listener_pid = None
+
+
+def _listen_invalidations():
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # pesan selama terputus mungkin terlewat
+            local_cache.clear()
+            for message in pubsub.listen():
+                for key in json.loads(message["data"]):
+                    local_cache.delete(key)
+        except Exception as e:
+            app_logger.error(f"Cache invalidation listener error: {str(e)}")
+            time.sleep(1)
+
+
+def _ensure_listener():
+    # satu thread per proses worker (dimulai ulang setelah fork)
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    _listener_pid = os.getpid()
+    local_cache.clear()
+    try:
+        get_redis_connection("default")
+    except NotImplementedError:
+        # backend cache bukan Redis (mis. locmem saat test), cukup TTL lokal
+        return
+    threading.Thread(target=_listen_invalidations, name="cache-invalidation", daemon=True).start()
+
+
+def _publish_invalidation(keys):
+    try:
+        get_redis_connection("default").publish(INVALIDATION_CHANNEL, json.dumps(keys))
+    except NotImplementedError:
+        pass
+
+
+def invalidate(*keys):
+    cache.delete_many(keys)
+    for key in keys:
+        local_cache.delete(key)
+    _publish_invalidation(keys)
+
+
+# =========================================================
+# VERSIONED KEYS
+# =========================================================
+# invalidasi cukup menaikkan nomor generasi (O(1)); key lama kedaluwarsa sendiri
+def get_version(namespace):
+    return cache.get_or_set(f"{namespace}:version", 1, timeout=None)
+
+
+def bump_version(namespace):
+    version_key = f"{namespace}:version"
+    cache.add(version_key, 1, timeout=None)
+    cache.incr(version_key)
+
+
+def versioned_key(namespace):
+    return f"{namespace}:v{get_version(namespace)}"
+
+
+# =========================================================
+# EVENT LIST
+# =========================================================
+EVENT_LIST_NAMESPACE = "events:list"
+
+
+def event_list_key(request):
+    # satu entry per kombinasi filter/cursor/host
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"{versioned_key(EVENT_LIST_NAMESPACE)}:{digest}"
+
+
+def invalidate_event_lists():
+    bump_version(EVENT_LIST_NAMESPACE)
+
+
+# =========================================================
+# TICKET LIST
+# =========================================================
+def ticket_list_namespace(event_id=None):
+    if event_id:
+        return f"tickets:event:{event_id}"
+    return "tickets:all"
+
+
+def invalidate_ticket_lists(*event_ids):
+    for event_id in set(filter(None, event_ids)):
+        bump_version(ticket_list_namespace(event_id))
+    bump_version(ticket_list_namespace())
+
+
+def write_through(key, value, timeout=CACHE_TIMEOUT):
+    # simpan data baru langsung, pembaca berikutnya tidak pernah melihat key kosong
+    cache.set(key, CacheEntry(value, time.time() + timeout, 0.0), timeout=timeout + STALE_TIMEOUT)
+    _publish_invalidation([key])
+    local_cache.set(key, value)
+
+
+def cache_fetch(key, loader, timeout=CACHE_TIMEOUT, local=False):
+    """Return ``(data, from_cache)``, running ``loader`` at most once across workers.
+
+    With ``local=True`` the value is also kept in the in-process LRU tier.
+    """
+    if local:
+        _ensure_listener()
+        value = local_cache.get(key)
+        if value is not None:
+            return value, True
+
+    value, from_cache = _fetch_shared(key, loader, timeout)
+    if local:
+        local_cache.set(key, value)
+    return value, from_cache
@@ -0,0 +1,12 @@
+import django_filters
+
+from .models import Event
+
+
+class EventFilter(django_filters.FilterSet):
+    start_after = django_filters.IsoDateTimeFilter(field_name="start_time", lookup_expr="gte")
+    start_before = django_filters.IsoDateTimeFilter(field_name="start_time", lookup_expr="lt")
+
+    class Meta:
+        model = Event
+        fields = ["category", "status", "location", "organizer", "start_after", "start_before"]
@@ -0,0 +1,111 @@
+import io
+import math
+
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE_WIDTH = 32
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def render_variants(data):
+    """Decode ``data`` once and return ``(variants, blurhash, (width, height))``.
+
+    ``variants`` is a list of ``(width, webp_bytes)``, never wider than the original.
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    width, height = image.size
+
+    widths = [w for w in VARIANT_WIDTHS if w < width] or [width]
+    if width < VARIANT_WIDTHS[-1] and width not in widths:
+        widths.append(width)
+
+    variants = []
+    for target in widths:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        buffer = io.BytesIO()
+        resized.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        variants.append((target, buffer.getvalue()))
+
+    return variants, blurhash(image), (width, height)
+
+
+def pick_variant(variants, width=None):
+    """Return the smallest variant at least ``width`` wide (the largest one otherwise)."""
+    if not variants:
+        return None, None
+    sizes = sorted(int(w) for w in variants)
+    chosen = next((w for w in sizes if width and w >= width), sizes[-1])
+    return chosen, variants[str(chosen)]
+
+
+# =========================================================
+# BLURHASH (https://blurha.sh)
+# =========================================================
+def _encode83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exp):
+    return math.copysign(abs(value) ** exp, value)
+
+
+def blurhash(image):
+    components_x, components_y = BLURHASH_COMPONENTS
+    # cukup hitung dari thumbnail kecil
+    sample = image.convert("RGB")
+    sample.thumbnail((BLURHASH_SAMPLE_WIDTH, BLURHASH_SAMPLE_WIDTH))
+    width, height = sample.size
+    pixels = [tuple(_srgb_to_linear(c) for c in pixel) for pixel in sample.getdata()]
+
+    factors = []
+    for j in range(components_y):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(components_x):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pr, pg, pb = pixels[y * width + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1
+    result += _encode83(quantised_max, 1)
+
+    result += _encode83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (max(0, min(18, int(_sign_pow(v / max_value, 0.5) * 9 + 9.5))) for v in factor)
+        result += _encode83(r * 19 * 19 + g * 19 + b, 2)
+    return result
@@ -0,0 +1,191 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import EventInventory, Registration, TicketInventory
+from DicoEvent.logging_config import app_logger
+
+INVENTORY_PREFIX = "dicoevent:inventory"
+RECONCILE_DELAY = 5  # detik, rekonsiliasi digabung per tiket
+
+# -1: key belum dimuat, -2: sisa tidak cukup, 1: berhasil (semua key dikurangi)
+RESERVE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    local remaining = redis.call('GET', key)
+    if not remaining then
+        return -1
+    end
+    if tonumber(remaining) < tonumber(ARGV[1]) then
+        return -2
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('DECRBY', key, ARGV[1])
+end
+return 1
+"""
+
+# hanya ubah key yang sudah dimuat; key kosong akan dimuat ulang dari database
+ADJUST_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('INCRBY', key, ARGV[1])
+    end
+end
+return 1
+"""
+
+
+class SoldOut(Exception):
+    pass
+
+
+def ticket_key(ticket_id):
+    return f"{INVENTORY_PREFIX}:ticket:{ticket_id}"
+
+
+def event_key(event_id):
+    return f"{INVENTORY_PREFIX}:event:{event_id}"
+
+
+def _redis_client():
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def count_sold(ticket_id, event_id):
+    active = Registration.objects.filter(status=Registration.ACTIVE)
+    sold_ticket = active.filter(ticket_id=ticket_id).count()
+    sold_event = active.filter(ticket__event_id=event_id).count()
+    return sold_ticket, sold_event
+
+
+# =========================================================
+# REDIS (jalur utama)
+# =========================================================
+def _load(client, ticket):
+    sold_ticket, sold_event = count_sold(ticket.id, ticket.event_id)
+    client.set(ticket_key(ticket.id), ticket.quota - sold_ticket, nx=True)
+    client.set(event_key(ticket.event_id), ticket.event.quota - sold_event, nx=True)
+
+
+def _reserve_redis(client, ticket, quantity):
+    keys = [ticket_key(ticket.id), event_key(ticket.event_id)]
+    script = client.register_script(RESERVE_SCRIPT)
+
+    result = script(keys=keys, args=[quantity])
+    if result == -1:
+        _load(client, ticket)
+        result = script(keys=keys, args=[quantity])
+    if result != 1:
+        raise SoldOut()
+
+
+def _adjust(client, keys, delta):
+    client.register_script(ADJUST_SCRIPT)(keys=keys, args=[delta])
+
+
+def release(ticket_id, event_id, quantity=1):
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        _adjust(client, [ticket_key(ticket_id), event_key(event_id)], quantity)
+    except RedisError as e:
+        app_logger.error(f"Failed to release inventory for ticket {ticket_id}: {str(e)}")
+    schedule_reconcile(ticket_id)
+
+
+def adjust_quota(delta, ticket_id=None, event_id=None):
+    client = _redis_client()
+    if client is None or not delta:
+        return
+    keys = []
+    if ticket_id:
+        keys.append(ticket_key(ticket_id))
+    if event_id:
+        keys.append(event_key(event_id))
+    try:
+        _adjust(client, keys, delta)
+    except RedisError as e:
+        app_logger.error(f"Failed to adjust inventory quota: {str(e)}")
+
+
+def forget(ticket_ids=(), event_ids=()):
+    # key dihapus agar dimuat ulang dari database pada reservasi berikutnya
+    client = _redis_client()
+    keys = [ticket_key(i) for i in ticket_ids] + [event_key(i) for i in event_ids]
+    if client is None or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except RedisError as e:
+        app_logger.error(f"Failed to reset inventory keys: {str(e)}")
+
+
+# =========================================================
+# POSTGRESQL (fallback)
+# =========================================================
+def _reserve_db(ticket, quantity):
+    EventInventory.objects.get_or_create(event_id=ticket.event_id)
+    TicketInventory.objects.get_or_create(ticket_id=ticket.id)
+
+    # urutan lock selalu event lalu tiket agar tidak deadlock
+    event_counter = EventInventory.objects.select_for_update().get(event_id=ticket.event_id)
+    ticket_counter = TicketInventory.objects.select_for_update().get(ticket_id=ticket.id)
+
+    sold_ticket, sold_event = count_sold(ticket.id, ticket.event_id)
+    if sold_ticket + quantity > ticket.quota or sold_event + quantity > ticket.event.quota:
+        raise SoldOut()
+
+    ticket_counter.sold = sold_ticket + quantity
+    ticket_counter.save(update_fields=["sold", "updated_at"])
+    event_counter.sold = sold_event + quantity
+    event_counter.save(update_fields=["sold", "updated_at"])
+
+
+@contextmanager
+def reserve(ticket, quantity=1):
+    """Reserve ``quantity`` seats on ``ticket`` (and its event) around the insert.
+
+    Raises ``SoldOut`` when either quota would be exceeded.
+    """
+    client = _redis_client()
+    if client is not None:
+        try:
+            _reserve_redis(client, ticket, quantity)
+        except RedisError as e:
+            app_logger.error(f"Redis inventory unavailable, falling back to database: {str(e)}")
+            client = None
+
+    if client is None:
+        with transaction.atomic():
+            _reserve_db(ticket, quantity)
+            yield
+        return
+
+    try:
+        yield
+    except Exception:
+        _adjust(client, [ticket_key(ticket.id), event_key(ticket.event_id)], quantity)
+        raise
+    schedule_reconcile(ticket.id)
+
+
+# =========================================================
+# REKONSILIASI
+# =========================================================
+def schedule_reconcile(ticket_id):
+    from .tasks import reconcile_ticket_inventory
+
+    if not cache.add(f"inventory:reconcile:{ticket_id}", 1, timeout=RECONCILE_DELAY):
+        return
+    try:
+        reconcile_ticket_inventory.apply_async((str(ticket_id),), countdown=RECONCILE_DELAY)
+    except Exception as e:
+        app_logger.error(f"Failed to schedule inventory reconcile for ticket {ticket_id}: {str(e)}")
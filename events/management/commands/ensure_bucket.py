@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from DicoEvent.minio_client import BUCKET_NAME, ensure_bucket
+
+
+class Command(BaseCommand):
+    help = "Check MinIO and create the media bucket if it does not exist."
+
+    def handle(self, *args, **options):
+        try:
+            ensure_bucket(force=True)
+        except Exception as e:
+            raise CommandError(f"MinIO is not reachable: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(f"Bucket '{BUCKET_NAME}' is ready."))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-18 09:19
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('simple', coalesce({prefix}name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({prefix}location, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({prefix}description, '')), 'C')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION events_event_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(prefix="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER events_event_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON events_event
+    FOR EACH ROW EXECUTE FUNCTION events_event_search_vector_update();
+
+UPDATE events_event SET search_vector = {SEARCH_VECTOR_SQL.format(prefix="")};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS events_event_search_vector_trigger ON events_event;
+DROP FUNCTION IF EXISTS events_event_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='event_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='event_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
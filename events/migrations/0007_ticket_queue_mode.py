@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_inventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='admission_rate',
+            field=models.PositiveIntegerField(default=50),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='queue_enabled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
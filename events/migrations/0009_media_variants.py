@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='blurhash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 09:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_media_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('object_name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveIntegerField()),
+                ('content_type', models.CharField(max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='mediablob',
+            index=models.Index(fields=['ref_count', 'updated_at'], name='mediablob_gc_idx'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='media', to='events.mediablob'),
+        ),
+    ]
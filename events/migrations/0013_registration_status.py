@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registration',
+            name='status',
+            field=models.CharField(default='active', max_length=20),
+        ),
+    ]
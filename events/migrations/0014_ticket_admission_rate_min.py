@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 10:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def fix_zero_admission_rate(apps, schema_editor):
+    # rate 0 tidak pernah mengizinkan admisi dan membuat _status membagi dengan nol
+    Ticket = apps.get_model("events", "Ticket")
+    Ticket.objects.filter(admission_rate=0).update(admission_rate=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_registration_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_zero_admission_rate, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticket',
+            name='admission_rate',
+            field=models.PositiveIntegerField(default=50, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
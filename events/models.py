@@ -1,6 +1,10 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Event(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -19,6 +23,21 @@ class Event(models.Model):
         related_name="events"
     )
 
+    # diisi oleh trigger database dari name, location, description
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["start_time", "id"], name="event_start_time_id_idx"),
+            # filter kesetaraan dulu, lalu range start_time
+            models.Index(fields=["category", "status", "location", "start_time"], name="event_cat_status_loc_idx"),
+            models.Index(fields=["status", "start_time"], name="event_status_start_idx"),
+            models.Index(fields=["location", "start_time"], name="event_location_start_idx"),
+            models.Index(fields=["organizer", "start_time"], name="event_organizer_start_idx"),
+            GinIndex(fields=["search_vector"], name="event_search_vector_idx"),
+            GinIndex(fields=["name"], name="event_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -29,6 +48,9 @@ class Ticket(models.Model):
     sales_start = models.DateTimeField()
     sales_end = models.DateTimeField()
     quota = models.IntegerField()
+    # waiting room: registrasi butuh admission token saat queue_enabled aktif
+    queue_enabled = models.BooleanField(default=False)
+    admission_rate = models.PositiveIntegerField(default=50, validators=[MinValueValidator(1)])  # user per detik
 
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="tickets")
 
@@ -36,9 +58,14 @@ class Ticket(models.Model):
         return f"{self.name} - {self.event.name}"
 
 class Registration(models.Model):
+    ACTIVE = "active"
+    CANCELLED = "cancelled"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="registrations")
     ticket = models.ForeignKey("Ticket", on_delete=models.CASCADE, related_name="registrations")
+    # dibatalkan (mis. pembayaran gagal) tanpa menghapus riwayat payment
+    status = models.CharField(max_length=20, default=ACTIVE)  # active, cancelled
     registered_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -55,11 +82,130 @@ class Payment(models.Model):
     def __str__(self):
         return f"{self.registration.user.username} - {self.payment_status}"
 
+class MediaBlob(models.Model):
+    # satu objek MinIO per isi file (SHA-256), dipakai bersama oleh banyak Media
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    object_name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveIntegerField()
+    content_type = models.CharField(max_length=100)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # kandidat garbage collection: blob tanpa referensi
+            models.Index(fields=["ref_count", "updated_at"], name="mediablob_gc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.object_name} ({self.ref_count} refs)"
+
 class Media(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     image = models.CharField(max_length=255)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name="media")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="media")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # diisi oleh task process_poster: {"320": "posters/..._320.webp", ...}
+    variants = models.JSONField(default=dict, blank=True)
+    blurhash = models.CharField(max_length=64, blank=True, default="")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.image} ({self.event.name})"
+
+class TicketInventory(models.Model):
+    # counter baris untuk fallback select_for_update dan hasil rekonsiliasi dari Redis
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name="inventory")
+    sold = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.ticket_id} - {self.sold} sold"
+
+class EventInventory(models.Model):
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name="inventory")
+    sold = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.sold} sold"
+
+class WaitlistEntry(models.Model):
+    WAITING = "waiting"
+    PROMOTED = "promoted"
+    CANCELED = "canceled"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="waitlist_entries")
+    status = models.CharField(max_length=20, default=WAITING)  # waiting, promoted, canceled
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # backup antrean bila Redis hilang: entry tertua yang masih menunggu
+            models.Index(fields=["ticket", "status", "created_at"], name="waitlist_ticket_status_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ticket", "user"],
+                condition=models.Q(status="waiting"),
+                name="waitlist_unique_waiting_user",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.ticket_id} ({self.status})"
+
+class Reminder(models.Model):
+    # ledger pengingat: satu baris per (registration, kind), dikirim tepat sekali
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    registration = models.ForeignKey(Registration, on_delete=models.CASCADE, related_name="reminders")
+    kind = models.CharField(max_length=20)  # mis. "h-2"
+    due_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # scan "due tapi belum terkirim"
+            models.Index(fields=["due_at"], condition=models.Q(sent_at__isnull=True), name="reminder_due_unsent_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["registration", "kind"], name="reminder_unique_registration_kind"),
+        ]
+
+    def __str__(self):
+        return f"{self.registration_id} - {self.kind} ({'sent' if self.sent_at else 'pending'})"
+
+class EmailOutbox(models.Model):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    # ditulis dalam transaksi yang sama dengan perubahan bisnis, dikirim oleh worker
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, default=PENDING)  # pending, sent, failed
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # antrean worker: pending yang sudah waktunya dikirim
+            models.Index(
+                fields=["next_attempt_at"], condition=models.Q(status="pending"), name="outbox_pending_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
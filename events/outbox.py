@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+from DicoEvent.logging_config import app_logger
+
+OUTBOX_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = timedelta(seconds=30)  # 30s, 60s, 120s, ...
+DRAIN_DEBOUNCE = 2  # detik
+
+
+def enqueue(subject, body, recipients):
+    """Queue one email; call inside the transaction of the change that triggers it."""
+    return enqueue_many([(subject, body, recipients)])[0]
+
+
+def enqueue_many(messages):
+    outbox = EmailOutbox.objects.bulk_create(
+        [EmailOutbox(subject=subject, body=body, recipients=list(recipients)) for subject, body, recipients in messages],
+        batch_size=OUTBOX_BATCH_SIZE,
+    )
+    # worker baru jalan setelah commit; rollback berarti email tidak pernah ada
+    transaction.on_commit(schedule_drain)
+    return outbox
+
+
+def schedule_drain():
+    from .tasks import drain_email_outbox
+
+    # drain dijalankan setelah jendela debounce agar semua enqueue di jendela itu ikut terkirim
+    if not cache.add("outbox:drain", 1, timeout=DRAIN_DEBOUNCE):
+        return
+    try:
+        drain_email_outbox.apply_async(countdown=DRAIN_DEBOUNCE)
+    except Exception as e:
+        app_logger.error(f"Failed to schedule email outbox drain: {str(e)}")
+
+
+def _backoff(message, now, error):
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= MAX_ATTEMPTS:
+        message.status = EmailOutbox.FAILED
+    else:
+        message.next_attempt_at = now + RETRY_BACKOFF * 2 ** (message.attempts - 1)
+
+
+def drain_batch(limit=OUTBOX_BATCH_SIZE):
+    """Send one batch of due messages; return ``(sent, failed)`` or ``None`` when nothing is due."""
+    now = timezone.now()
+    with transaction.atomic():
+        # worker lain melewati baris yang sedang dikunci
+        messages = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:limit]
+        )
+        if not messages:
+            return None
+
+        sent = failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            app_logger.error(f"Failed to open SMTP connection for email outbox: {str(e)}")
+            for message in messages:
+                _backoff(message, now, str(e))
+            failed = len(messages)
+        else:
+            try:
+                for message in messages:
+                    try:
+                        EmailMessage(message.subject, message.body, None, message.recipients, connection=connection).send()
+                        message.status = EmailOutbox.SENT
+                        message.sent_at = timezone.now()
+                        sent += 1
+                    except Exception as e:
+                        app_logger.error(f"Failed to send email {message.id} to {message.recipients}: {str(e)}")
+                        _backoff(message, now, str(e))
+                        failed += 1
+            finally:
+                connection.close()
+
+        EmailOutbox.objects.bulk_update(
+            messages, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    return sent, failed
@@ -0,0 +1,117 @@
+import uuid
+
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class EventCursorPagination(CursorPagination):
+    # keyset pagination di atas index (start_time, id), biaya per halaman tetap
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("start_time", "id")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        # ordering dari ?ordering= hanya start_time, tambahkan id sebagai tie-breaker
+        if len(ordering) == 1:
+            field = ordering[0]
+            ordering = (field, "-id" if field.startswith("-") else "id")
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+        current_position = self.cursor.position if self.cursor else None
+
+        if reverse:
+            queryset = queryset.order_by(*[o[1:] if o.startswith("-") else f"-{o}" for o in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # cursor berisi (start_time, id), jadi seek selalu lewat index tanpa OFFSET
+        if current_position is not None:
+            queryset = self._seek(queryset, current_position, reverse)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _seek(self, queryset, position, reverse):
+        start_time, _, pk = position.partition("|")
+        try:
+            start_time = parse_datetime(start_time)
+            pk = uuid.UUID(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if start_time is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        # kedua kolom selalu searah (lihat get_ordering), cukup satu perbandingan row
+        descending = self.ordering[0].startswith("-")
+        operator = "<" if reverse != descending else ">"
+        meta = queryset.model._meta
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+        time_field = meta.get_field(self.ordering[0].lstrip("-"))
+        pk_field = meta.pk
+        table = qn(meta.db_table)
+        return queryset.extra(
+            where=[f"({table}.{qn(time_field.column)}, {table}.{qn(pk_field.column)}) {operator} (%s, %s)"],
+            params=[
+                time_field.get_db_prep_value(start_time, connection),
+                pk_field.get_db_prep_value(pk, connection),
+            ],
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        field_name = ordering[0].lstrip("-")
+        if isinstance(instance, dict):
+            return f"{instance[field_name].isoformat()}|{instance['id']}"
+        return f"{getattr(instance, field_name).isoformat()}|{instance.pk}"
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "events": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["events"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "events": schema,
+            },
+        }
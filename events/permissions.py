@@ -1,37 +1,58 @@
 from rest_framework import permissions
+from users.roles import has_role
+from .waiting_room import get_queue_config, verify_admission_token
 
 class IsAdminOrSuperUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and (
-            request.user.is_superuser or request.user.groups.filter(name="admin").exists()
+            request.user.is_superuser or has_role(request, "admin")
         )
 
 class IsOrganizerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.organizer == request.user
+        return obj.organizer_id == request.user.id
 
 class IsOrganizerOfEvent(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if request.user.is_superuser or has_role(request, "admin"):
             return True
-        return obj.event.organizer == request.user
+        return obj.event.organizer_id == request.user.id
 
 class IsOwnerOrAdminOrOrganizer(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if request.user.is_superuser or has_role(request, "admin"):
             return True
-        if request.user.groups.filter(name="organizer").exists():
-            return obj.ticket.event.organizer == request.user
-        return obj.user == request.user
+        if has_role(request, "organizer"):
+            return obj.ticket.event.organizer_id == request.user.id
+        return obj.user_id == request.user.id
 
 class IsOwnerOrAdminOrOrganizerPayment(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if request.user.is_superuser or has_role(request, "admin"):
             return True
-        if request.user.groups.filter(name="organizer").exists():
-            return obj.registration.ticket.event.organizer == request.user
-        return obj.registration.user == request.user
+        if has_role(request, "organizer"):
+            return obj.registration.ticket.event.organizer_id == request.user.id
+        return obj.registration.user_id == request.user.id
+
+class HasAdmissionToken(permissions.BasePermission):
+    message = "A valid admission token is required while this ticket is in queue mode."
+
+    def has_permission(self, request, view):
+        if view.action != "create":
+            return True
+        ticket_id = request.data.get("ticket_id")
+        config = get_queue_config(ticket_id)
+        if not config or not config[0]:
+            return True
+        token = request.headers.get("X-Admission-Token") or request.data.get("admission_token")
+        payload = verify_admission_token(token, ticket_id, request.user.id)
+        # token hanya berlaku untuk registrasi atas nama pemilik token
+        if payload is None or str(request.data.get("user_id")) != payload["user"]:
+            return False
+        # nonce diklaim di perform_create, setelah payload lolos validasi
+        request.admission_nonce = payload["nonce"]
+        return True
@@ -0,0 +1,57 @@
+class QueryPlanMixin:
+    # per action: {"select_related": [...], "prefetch_related": [...], "only": [...]}
+    query_plans = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.query_plans.get(getattr(self, "action", None))
+        if not plan:
+            return queryset
+
+        if plan.get("select_related"):
+            queryset = queryset.select_related(*plan["select_related"])
+        if plan.get("prefetch_related"):
+            queryset = queryset.prefetch_related(*plan["prefetch_related"])
+        if plan.get("only"):
+            queryset = queryset.only(*plan["only"])
+        return queryset
+
+
+REGISTRATION_COLUMNS = ["id", "user_id", "ticket_id", "status", "registered_at"]
+PAYMENT_COLUMNS = [
+    "id", "registration_id", "payment_method", "payment_status", "amount_paid", "paid_at",
+]
+
+REGISTRATION_QUERY_PLANS = {
+    "list": {"only": REGISTRATION_COLUMNS},
+    # IsOwnerOrAdminOrOrganizer membaca ticket.event.organizer_id
+    "retrieve": {
+        "select_related": ["ticket__event"],
+        "only": REGISTRATION_COLUMNS + ["ticket__event__organizer_id"],
+    },
+    # inventory dikembalikan ke ticket dan event saat registrasi dihapus
+    "destroy": {"select_related": ["ticket"]},
+}
+
+PAYMENT_QUERY_PLANS = {
+    "list": {"only": PAYMENT_COLUMNS},
+    # IsOwnerOrAdminOrOrganizerPayment membaca registration.user_id dan ticket.event.organizer_id
+    "retrieve": {
+        "select_related": ["registration__ticket__event"],
+        "only": PAYMENT_COLUMNS + [
+            "registration__user_id",
+            "registration__ticket__event__organizer_id",
+        ],
+    },
+    # IsOwnerOrAdminOrOrganizerPayment + pembayaran gagal membatalkan registrasi (butuh ticket.event_id)
+    "update": {"select_related": ["registration__ticket__event"]},
+    "partial_update": {"select_related": ["registration__ticket__event"]},
+}
+
+TICKET_QUERY_PLANS = {
+    # IsOrganizerOfEvent membaca event.organizer_id
+    "update": {"select_related": ["event"]},
+    "partial_update": {"select_related": ["event"]},
+    "destroy": {"select_related": ["event"]},
+    "waitlist": {"select_related": ["event"]},
+}
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Registration, Reminder
+
+# kind -> berapa lama sebelum event dimulai
+REMINDER_KINDS = {"h-2": timedelta(hours=2)}
+# ledger diisi sedikit lebih awal agar baris sudah ada saat jatuh tempo
+REMINDER_LOOKAHEAD = timedelta(minutes=10)
+# claim yang tidak selesai (worker mati) boleh diambil ulang
+CLAIM_TIMEOUT = timedelta(minutes=10)
+LEDGER_BATCH_SIZE = 1000
+
+
+def fill_ledger(now):
+    """Create missing ledger rows for events starting inside the sliding window."""
+    created = 0
+    for kind, lead in REMINDER_KINDS.items():
+        pending = (
+            Registration.objects.filter(
+                status=Registration.ACTIVE,
+                ticket__event__start_time__gt=now,
+                ticket__event__start_time__lte=now + lead + REMINDER_LOOKAHEAD,
+            )
+            .exclude(reminders__kind=kind)
+            .values_list("id", "ticket__event__start_time")
+            .iterator(chunk_size=LEDGER_BATCH_SIZE)
+        )
+
+        batch = []
+        for registration_id, start_time in pending:
+            batch.append(Reminder(registration_id=registration_id, kind=kind, due_at=start_time - lead))
+            if len(batch) >= LEDGER_BATCH_SIZE:
+                created += len(Reminder.objects.bulk_create(batch, ignore_conflicts=True))
+                batch = []
+        if batch:
+            created += len(Reminder.objects.bulk_create(batch, ignore_conflicts=True))
+    return created
+
+
+def due_reminders(now):
+    # jendela geser: semua yang sudah jatuh tempo dan event-nya belum mulai
+    return Reminder.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT),
+        sent_at__isnull=True,
+        due_at__lte=now,
+        registration__status=Registration.ACTIVE,
+        registration__ticket__event__start_time__gt=now,
+    )
+
+
+def claim_due(now, limit):
+    """Claim up to ``limit`` due reminders as ``(id, user_id)``; concurrent callers never get the same rows."""
+    with transaction.atomic():
+        claimed = list(
+            due_reminders(now)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("due_at")
+            .values_list("id", "registration__user_id")[:limit]
+        )
+        Reminder.objects.filter(id__in=[reminder_id for reminder_id, _ in claimed]).update(claimed_at=now)
+    return claimed
+
+
+def render_digest(user, events):
+    """One email for every event of ``user`` in this window; a single event keeps the plain reminder."""
+    events = sorted(events, key=lambda event: event.start_time)
+    if len(events) == 1:
+        event = events[0]
+        return (
+            f"Reminder: {event.name}",
+            f"Halo {user.username},\n\n"
+            f"Jangan lupa! Event '{event.name}' akan dimulai pada {event.start_time}.",
+        )
+
+    lines = "\n".join(f"- {event.name} ({event.start_time})" for event in events)
+    return (
+        f"Reminder: {len(events)} event akan segera dimulai",
+        f"Halo {user.username},\n\n"
+        f"Jangan lupa! Event berikut akan segera dimulai:\n{lines}",
+    )
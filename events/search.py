@@ -0,0 +1,23 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F
+
+# harus sama dengan konfigurasi di trigger events_event_search_vector_update
+SEARCH_CONFIG = "simple"
+
+
+def search_events(queryset, q, limit):
+    query = SearchQuery(q, config=SEARCH_CONFIG, search_type="websearch")
+    results = list(
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "start_time", "id")[:limit]
+    )
+    if results:
+        return results
+
+    # fallback trigram (index gin_trgm_ops pada name) untuk salah ketik
+    return list(
+        queryset.filter(name__trigram_word_similar=q)
+        .annotate(similarity=TrigramWordSimilarity(q, "name"))
+        .order_by("-similarity", "start_time", "id")[:limit]
+    )
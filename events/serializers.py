@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Event, Ticket, Registration, Payment, Media
+from .inventory import SoldOut, reserve
 
 class EventSerializer(serializers.ModelSerializer):
     organizer_id = serializers.UUIDField(write_only=True, required=True)
@@ -29,7 +30,7 @@ class TicketSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = [
             'id', 'name', 'price', 'sales_start', 'sales_end',
-            'quota', 'event', 'event_id'
+            'quota', 'queue_enabled', 'admission_rate', 'event', 'event_id'
         ]
         extra_kwargs = {
             'event': {'read_only': True}
@@ -46,16 +47,32 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Registration
-        fields = ['id', 'user', 'ticket', 'ticket_id', 'user_id', 'registered_at']
+        fields = ['id', 'user', 'ticket', 'ticket_id', 'user_id', 'status', 'registered_at']
         extra_kwargs = {
             'user': {'read_only': True},
-            'ticket': {'read_only': True}
+            'ticket': {'read_only': True},
+            'status': {'read_only': True}
         }
 
     def create(self, validated_data):
         ticket_id = validated_data.pop('ticket_id')
         user_id = validated_data.pop('user_id')
-        registration = Registration.objects.create(user_id=user_id, ticket_id=ticket_id, **validated_data)
+
+        ticket = (
+            Ticket.objects.select_related('event')
+            .only('id', 'quota', 'event__id', 'event__quota')
+            .filter(id=ticket_id)
+            .first()
+        )
+        if ticket is None:
+            raise serializers.ValidationError({'ticket_id': 'Ticket not found.'})
+
+        # kuota tiket dan event dicek secara atomik sebelum insert
+        try:
+            with reserve(ticket):
+                registration = Registration.objects.create(user_id=user_id, ticket_id=ticket_id, **validated_data)
+        except SoldOut:
+            raise serializers.ValidationError({'ticket_id': 'Ticket is sold out.'})
         return registration
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -80,7 +97,8 @@ class PaymentSerializer(serializers.ModelSerializer):
 class MediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Media
-        fields = ["id", "image", "event", "uploaded_at"]
+        fields = ["id", "image", "event", "uploaded_at", "variants", "blurhash", "width", "height"]
+        read_only_fields = ["variants", "blurhash", "width", "height"]
         extra_kwargs = {
             "event": {"write_only": True}
         }
\ No newline at end of file
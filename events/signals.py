@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Media
+from .storage import release_blob
+
+
+# 🔹 Media ikut terhapus saat event dihapus (CASCADE), referensi blob dikurangi
+@receiver(post_delete, sender=Media)
+def release_media_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
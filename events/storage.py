@@ -0,0 +1,192 @@
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Media, MediaBlob
+from DicoEvent.minio_client import minio_client, BUCKET_NAME, ensure_bucket
+from DicoEvent.logging_config import app_logger
+
+BLOB_PREFIX = "blobs"
+BLOB_GC_GRACE = timedelta(hours=1)  # blob baru tanpa referensi belum dihapus
+BLOB_GC_BATCH = 200
+POSTER_URL_EXPIRY = timedelta(hours=1)
+# lebih pendek dari expiry: URL dari cache selalu masih berlaku minimal 15 menit
+POSTER_URL_CACHE_TIMEOUT = 45 * 60
+
+
+class Sha256UploadHandler(FileUploadHandler):
+    """Hash each uploaded file while Django streams it in; digests are kept in ``digests``."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._hasher.update(raw_data)
+        # diteruskan ke handler berikutnya (memory/temporary file)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._hasher.hexdigest()
+        return None
+
+
+def blob_object_name(sha256, content_type):
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{mimetypes.guess_extension(content_type) or ''}"
+
+
+def _processed_fields(blob):
+    # varian dari Media lain dengan blob yang sama, bila sudah pernah diproses
+    processed = (
+        Media.objects.filter(blob=blob)
+        .exclude(blurhash="")
+        .only("variants", "blurhash", "width", "height")
+        .first()
+    )
+    if processed is None:
+        return None
+    return {
+        "variants": processed.variants,
+        "blurhash": processed.blurhash,
+        "width": processed.width,
+        "height": processed.height,
+    }
+
+
+def _add_ref(blob):
+    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1, updated_at=timezone.now())
+
+
+def _attach(event_id, blob):
+    # dipanggil di dalam transaksi
+    _add_ref(blob)
+    fields = _processed_fields(blob)
+    media = Media.objects.create(image=blob.object_name, blob=blob, event_id=event_id, **(fields or {}))
+    return media, fields is not None
+
+
+def store_upload(event_id, file_obj, sha256, content_type):
+    """Create a ``Media`` for an uploaded file; return ``(media, processed)``.
+
+    A known hash reuses its blob and skips the MinIO write entirely.
+    """
+    with transaction.atomic():
+        # lock baris blob agar tidak dihapus GC di tengah jalan
+        blob = MediaBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            ensure_bucket()
+            object_name = blob_object_name(sha256, content_type)
+            minio_client.put_object(
+                BUCKET_NAME,
+                object_name,
+                file_obj,
+                length=file_obj.size,
+                content_type=content_type,
+            )
+            blob, _ = MediaBlob.objects.get_or_create(
+                sha256=sha256,
+                defaults={"object_name": object_name, "size": file_obj.size, "content_type": content_type},
+            )
+        return _attach(event_id, blob)
+
+
+def adopt_upload(media, sha256, size, content_type):
+    """Attach a directly uploaded ``media`` to the blob for ``sha256``; return ``(blob, processed)``.
+
+    Called from ``process_poster``, which already reads the object, so upload bytes
+    never pass through the web workers.
+    """
+    object_name = media.image
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            # objek hasil upload langsung dipakai sebagai blob, tanpa copy
+            blob, _ = MediaBlob.objects.get_or_create(
+                sha256=sha256,
+                defaults={"object_name": object_name, "size": size, "content_type": content_type},
+            )
+        _add_ref(blob)
+        fields = _processed_fields(blob)
+        Media.objects.filter(id=media.id).update(image=blob.object_name, blob=blob, **(fields or {}))
+
+    if blob.object_name != object_name:
+        minio_client.remove_object(BUCKET_NAME, object_name)
+        app_logger.info(f"Duplicate upload {object_name} resolved to blob {sha256}")
+    return blob, fields is not None
+
+
+def poster_url_key(object_name):
+    return f"poster:url:{hashlib.md5(object_name.encode()).hexdigest()}"
+
+
+def presigned_urls(object_names):
+    """Return ``{object_name: url}``; URLs are reused from the cache so they stay byte-identical."""
+    keys = {name: poster_url_key(name) for name in set(object_names)}
+    cached = cache.get_many(list(keys.values()))
+
+    urls, fresh = {}, {}
+    for name, key in keys.items():
+        if key in cached:
+            urls[name] = cached[key]
+            continue
+        try:
+            urls[name] = minio_client.presigned_get_object(BUCKET_NAME, name, expires=POSTER_URL_EXPIRY)
+        except Exception:
+            urls[name] = None
+            continue
+        fresh[key] = urls[name]
+
+    if fresh:
+        cache.set_many(fresh, timeout=POSTER_URL_CACHE_TIMEOUT)
+    return urls
+
+
+def release_blob(blob_id):
+    MediaBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def _remove_objects(object_name):
+    # file asli beserta varian WebP-nya (prefix yang sama)
+    base, _ = os.path.splitext(object_name)
+    for obj in minio_client.list_objects(BUCKET_NAME, prefix=base):
+        minio_client.remove_object(BUCKET_NAME, obj.object_name)
+
+
+def collect_orphans(limit=BLOB_GC_BATCH):
+    cutoff = timezone.now() - BLOB_GC_GRACE
+    candidates = MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list("sha256", flat=True)
+
+    removed = 0
+    for sha256 in list(candidates[:limit]):
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update(skip_locked=True).filter(sha256=sha256, ref_count=0).first()
+            if blob is None:
+                continue
+            # ref_count melenceng dari data: perbaiki, jangan hapus
+            refs = blob.media.count()
+            if refs:
+                MediaBlob.objects.filter(pk=sha256).update(ref_count=refs)
+                continue
+            # objek dihapus selagi baris masih dikunci: upload dengan hash yang sama
+            # menunggu lock ini dan baru menulis ulang objek setelah baris terhapus
+            try:
+                _remove_objects(blob.object_name)
+            except Exception as e:
+                app_logger.error(f"Failed to remove blob objects {blob.object_name}: {str(e)}")
+                continue
+            blob.delete()
+        removed += 1
+    return removed
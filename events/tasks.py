@@ -1,38 +1,219 @@
+import hashlib
+import io
+import os
+from collections import defaultdict
 from celery import shared_task
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
-from .models import Registration
+from .models import Media, Registration, Reminder, Ticket, TicketInventory, EventInventory
+from .inventory import SoldOut, count_sold, reserve
+from . import outbox, reminders, waitlist
+from .images import render_variants
+from .storage import adopt_upload, collect_orphans
+from DicoEvent.minio_client import minio_client, BUCKET_NAME
 from DicoEvent.logging_config import app_logger
 
+REMINDER_CHUNK_SIZE = 500
+
+
 @shared_task
 def send_event_reminders():
     now = timezone.now()
-    reminder_time = now + timedelta(hours=2)
+    created = reminders.fill_ledger(now)
 
-    registrations = Registration.objects.filter(
-        ticket__event__start_time__gte=reminder_time,
-        ticket__event__start_time__lt=reminder_time + timedelta(minutes=5)
-    )
+    # claim per chunk (SKIP LOCKED), lalu dikelompokkan per user
+    by_user = defaultdict(list)
+    while True:
+        claimed = reminders.claim_due(now, REMINDER_CHUNK_SIZE)
+        if not claimed:
+            break
+        for reminder_id, user_id in claimed:
+            by_user[user_id].append(str(reminder_id))
+
+    # satu subtask per chunk; reminder milik satu user tidak pernah dipecah
+    total = chunks = 0
+    batch = []
+    for ids in by_user.values():
+        if batch and len(batch) + len(ids) > REMINDER_CHUNK_SIZE:
+            send_reminder_batch.delay(batch)
+            chunks += 1
+            batch = []
+        batch.extend(ids)
+        total += len(ids)
+    if batch:
+        send_reminder_batch.delay(batch)
+        chunks += 1
+
+    if not total:
+        app_logger.info("No reminders due")
 
-    if not registrations.exists():
-        app_logger.info("No registrations found for reminder window")
+    return f"Ledger +{created}, queued {total} reminders in {chunks} batches"
 
-    for reg in registrations:
-        event = reg.ticket.event
-        user = reg.user
-        subject = f"Reminder: {event.name}"
-        message = (
-            f"Halo {user.username},\n\n"
-            f"Jangan lupa! Event '{event.name}' akan dimulai pada {event.start_time}."
+
+@shared_task
+def send_reminder_batch(reminder_ids):
+    with transaction.atomic():
+        # ledger ditandai dan email masuk outbox dalam satu transaksi: tepat sekali
+        due = list(
+            Reminder.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(id__in=reminder_ids, sent_at__isnull=True)
+            .select_related("registration__ticket__event", "registration__user")
+            .only(
+                "id",
+                "registration__user__username",
+                "registration__user__email",
+                "registration__ticket__event__name",
+                "registration__ticket__event__start_time",
+            )
         )
 
+        # digest: satu email per user untuk semua event di jendela ini
+        by_user = {}
+        for reminder in due:
+            user = reminder.registration.user
+            by_user.setdefault(user.id, (user, []))[1].append(reminder.registration.ticket.event)
+
+        messages = []
+        for user, events in by_user.values():
+            subject, body = reminders.render_digest(user, events)
+            messages.append((subject, body, [user.email]))
+
+        outbox.enqueue_many(messages)
+        Reminder.objects.filter(id__in=[reminder.id for reminder in due]).update(sent_at=timezone.now())
+
+    app_logger.info(f"Queued {len(due)} reminders as {len(messages)} emails to the email outbox")
+    return f"Queued {len(due)} reminders as {len(messages)} emails"
+
+
+@shared_task
+def drain_email_outbox():
+    sent = failed = 0
+    while True:
+        result = outbox.drain_batch()
+        if result is None:
+            break
+        sent += result[0]
+        failed += result[1]
+
+    if sent or failed:
+        app_logger.info(f"Email outbox drained: {sent} sent, {failed} failed")
+    return f"Sent {sent} emails, {failed} failed"
+
+
+@shared_task
+def reconcile_ticket_inventory(ticket_id):
+    ticket = Ticket.objects.filter(id=ticket_id).only("id", "event_id").first()
+    if ticket is None:
+        return f"Ticket {ticket_id} not found"
+
+    sold_ticket, sold_event = count_sold(ticket.id, ticket.event_id)
+    TicketInventory.objects.update_or_create(ticket_id=ticket.id, defaults={"sold": sold_ticket})
+    EventInventory.objects.update_or_create(event_id=ticket.event_id, defaults={"sold": sold_event})
+
+    app_logger.info(f"Inventory reconciled for ticket {ticket_id}: {sold_ticket} sold")
+    return f"Ticket {ticket_id}: {sold_ticket} sold, event {ticket.event_id}: {sold_event} sold"
+
+
+@shared_task
+def promote_waitlist(ticket_id):
+    ticket = (
+        Ticket.objects.select_related("event")
+        .only("id", "name", "quota", "event__id", "event__name", "event__quota")
+        .filter(id=ticket_id)
+        .first()
+    )
+    if ticket is None:
+        return f"Ticket {ticket_id} not found"
+
+    entry = waitlist.pop_next(ticket.id)
+    if entry is None:
+        return f"No waitlist entries for ticket {ticket_id}"
+
+    user = entry.user
+    try:
+        with reserve(ticket), transaction.atomic():
+            registration = Registration.objects.create(user_id=entry.user_id, ticket_id=ticket.id)
+            outbox.enqueue(
+                f"Tiket tersedia: {ticket.event.name}",
+                (
+                    f"Halo {user.username},\n\n"
+                    f"Kamu sudah terdaftar untuk tiket '{ticket.name}' pada event '{ticket.event.name}' "
+                    f"dari daftar tunggu."
+                ),
+                [user.email],
+            )
+    except SoldOut:
+        waitlist.requeue(entry)
+        return f"Ticket {ticket_id} is still sold out"
+
+    app_logger.info(f"Waitlist entry {entry.id} promoted to registration {registration.id}")
+    return f"Promoted {entry.user_id} for ticket {ticket_id}"
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def process_poster(self, media_id):
+    media = Media.objects.filter(id=media_id).only("id", "image", "blob").first()
+    if media is None:
+        return f"Media {media_id} not found"
+
+    try:
+        obj = minio_client.get_object(BUCKET_NAME, media.image)
         try:
-            send_mail(subject, message, None, [user.email], fail_silently=False)
-            app_logger.info(
-                f"Reminder sent to {user.email} for event {event.name} ({event.start_time})"
+            data = obj.read()
+            content_type = obj.headers.get("Content-Type", "")
+        finally:
+            obj.close()
+            obj.release_conn()
+    except Exception as e:
+        app_logger.error(f"Failed to fetch poster {media.image}: {str(e)}")
+        raise self.retry(exc=e)
+
+    # upload langsung (upload-confirm) belum punya blob: dedup berdasarkan hash di sini
+    if media.blob_id is None:
+        blob, processed = adopt_upload(media, hashlib.sha256(data).hexdigest(), len(data), content_type)
+        if processed:
+            return f"Media {media_id}: reused variants of blob {blob.sha256}"
+        media.image, media.blob_id = blob.object_name, blob.sha256
+
+    try:
+        variants, placeholder, (width, height) = render_variants(data)
+    except Exception as e:
+        # bukan gambar yang bisa dibaca Pillow, tidak perlu retry
+        app_logger.error(f"Failed to decode poster {media.image}: {str(e)}")
+        return f"Media {media_id} is not a valid image"
+
+    base, _ = os.path.splitext(media.image)
+    stored = {}
+    try:
+        for variant_width, content in variants:
+            object_name = f"{base}_{variant_width}.webp"
+            minio_client.put_object(
+                BUCKET_NAME,
+                object_name,
+                io.BytesIO(content),
+                length=len(content),
+                content_type="image/webp",
             )
-        except Exception as e:
-            app_logger.error(f"Failed to send reminder to {user.email}: {str(e)}")
+            stored[str(variant_width)] = object_name
+    except Exception as e:
+        app_logger.error(f"Failed to store poster variants for {media.image}: {str(e)}")
+        raise self.retry(exc=e)
+
+    # semua Media dengan blob yang sama memakai varian yang sama
+    Media.objects.filter(blob_id=media.blob_id).update(variants=stored, blurhash=placeholder, width=width, height=height)
+    app_logger.info(f"Poster {media.image} processed into {len(stored)} variants")
+    return f"Media {media_id}: {sorted(stored)}"
+
+
+@shared_task
+def collect_orphan_blobs():
+    removed = collect_orphans()
+    app_logger.info(f"Removed {removed} orphaned poster blobs")
+    return f"Removed {removed} orphaned blobs"
+
 
-    return f"Sent {registrations.count()} reminders"
+def schedule_poster_processing(media_id):
+    try:
+        process_poster.delay(str(media_id))
+    except Exception as e:
+        app_logger.error(f"Failed to schedule poster processing for media {media_id}: {str(e)}")
@@ -1,3 +1,89 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User
+from .models import Event, Ticket, Registration, Payment
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryCountTests(APITestCase):
+    # jumlah query per endpoint harus tetap, berapa pun banyaknya data;
+    # role user sudah ada di cache setelah request pertama
+    LIST_QUERIES = 1
+    RETRIEVE_QUERIES = 1
+
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user("organizer", "organizer@example.com", "password")
+        self.organizer.groups.add(Group.objects.create(name="organizer"))
+        self.attendee = User.objects.create_user("attendee", "attendee@example.com", "password")
+
+        now = timezone.now()
+        self.event = Event.objects.create(
+            name="Konser", description="Konser musik", location="Jakarta",
+            start_time=now + timedelta(days=7), end_time=now + timedelta(days=8),
+            status="scheduled", category="concert", quota=100, organizer=self.organizer,
+        )
+        self.ticket = Ticket.objects.create(
+            name="Regular", price=100000, sales_start=now, sales_end=now + timedelta(days=6),
+            quota=100, event=self.event,
+        )
+
+    def create_registrations(self, count):
+        payments = []
+        for _ in range(count):
+            registration = Registration.objects.create(user=self.attendee, ticket=self.ticket)
+            payments.append(Payment.objects.create(
+                registration=registration, payment_method="bank_transfer", amount_paid=100000,
+            ))
+        return payments
+
+    def assert_list_queries(self, user, url, key):
+        self.client.force_authenticate(user)
+        self.client.get(url)
+        for count in (1, 10):
+            self.create_registrations(count)
+            with self.assertNumQueries(self.LIST_QUERIES):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.data[key])
+
+    def test_registration_list_as_organizer(self):
+        self.assert_list_queries(self.organizer, "/api/registrations/", "registrations")
+
+    def test_registration_list_as_attendee(self):
+        self.assert_list_queries(self.attendee, "/api/registrations/", "registrations")
+
+    def test_payment_list_as_organizer(self):
+        self.assert_list_queries(self.organizer, "/api/payments/", "payments")
+
+    def test_payment_list_as_attendee(self):
+        self.assert_list_queries(self.attendee, "/api/payments/", "payments")
+
+    def test_registration_retrieve(self):
+        payment = self.create_registrations(1)[0]
+        for user in (self.organizer, self.attendee):
+            self.client.force_authenticate(user)
+            url = f"/api/registrations/{payment.registration_id}/"
+            self.client.get(url)
+            with self.assertNumQueries(self.RETRIEVE_QUERIES):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_payment_retrieve(self):
+        payment = self.create_registrations(1)[0]
+        for user in (self.organizer, self.attendee):
+            self.client.force_authenticate(user)
+            url = f"/api/payments/{payment.id}/"
+            self.client.get(url)
+            with self.assertNumQueries(self.RETRIEVE_QUERIES):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
@@ -1,7 +1,15 @@
 import mimetypes
+import uuid
+from django.core import signing
 from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django_filters.rest_framework import DjangoFilterBackend
+from minio.error import S3Error
 from rest_framework import viewsets, permissions, status, response
+from rest_framework.filters import OrderingFilter
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 
@@ -13,18 +21,92 @@ from .serializers import (
     RegistrationSerializer,
     PaymentSerializer,
 )
+from .cache import (
+    EVENT_LIST_TIMEOUT,
+    cache_fetch,
+    event_list_key,
+    invalidate,
+    invalidate_event_lists,
+    invalidate_ticket_lists,
+    ticket_list_namespace,
+    versioned_key,
+    write_through,
+)
+from . import inventory, waiting_room, waitlist
+from .bulk import (
+    BULK_MAX_ITEMS,
+    bulk_register,
+    bulk_create_events,
+    bulk_update_events,
+    bulk_create_tickets,
+    bulk_update_tickets,
+)
+from .filters import EventFilter
+from .pagination import EventCursorPagination
+from .query_plans import (
+    QueryPlanMixin,
+    REGISTRATION_QUERY_PLANS,
+    PAYMENT_QUERY_PLANS,
+    TICKET_QUERY_PLANS,
+)
+from .search import search_events
+from .images import pick_variant
+from .tasks import schedule_poster_processing
+from .storage import Sha256UploadHandler, presigned_urls, store_upload
 from .permissions import (
     IsAdminOrSuperUser,
     IsOrganizerOrReadOnly,
     IsOrganizerOfEvent,
     IsOwnerOrAdminOrOrganizer,
     IsOwnerOrAdminOrOrganizerPayment,
+    HasAdmissionToken,
 )
-from DicoEvent.minio_client import minio_client, BUCKET_NAME
+from users.roles import has_role
+from DicoEvent.minio_client import minio_client, BUCKET_NAME, UPLOAD_URL_EXPIRY, presigned_upload
 
 from DicoEvent.logging_config import app_logger
 
 MAX_FILE_SIZE = 500 * 1024  # 500 KB
+UPLOAD_TOKEN_SALT = "events.poster_upload"
+POSTER_BATCH_MAX = 100
+
+
+def bulk_payload_error(data):
+    if not isinstance(data, list) or not data:
+        return Response({"error": "A non-empty list is required."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(data) > BULK_MAX_ITEMS:
+        return Response({"error": f"At most {BULK_MAX_ITEMS} items per request."}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def serialize_posters(medias, width):
+    # varian belum diproses: pakai file asli
+    chosen = []
+    for media in medias:
+        variant_width, object_name = pick_variant(media.variants, width)
+        chosen.append((variant_width or media.width, object_name or media.image))
+    urls = presigned_urls(object_name for _, object_name in chosen)
+
+    return [
+        {
+            "id": str(media.id),
+            "image": media.image,
+            "url": urls[object_name],
+            "width": variant_width,
+            "blurhash": media.blurhash or None,
+        }
+        for media, (variant_width, object_name) in zip(medias, chosen)
+    ]
+
+
+def sync_ticket_state(instance, old_event_id, old_quota):
+    # inventory dan waitlist mengikuti perubahan kuota/event tiket
+    if instance.event_id != old_event_id:
+        inventory.forget([instance.id], [old_event_id, instance.event_id])
+    else:
+        inventory.adjust_quota(instance.quota - old_quota, ticket_id=instance.id)
+    if instance.quota > old_quota:
+        waitlist.schedule_promotion(instance.id)
 
 
 # =========================================================
@@ -33,48 +115,105 @@ MAX_FILE_SIZE = 500 * 1024  # 500 KB
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    pagination_class = EventCursorPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = EventFilter
+    ordering_fields = ["start_time"]
+    ordering = ["start_time"]
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.AllowAny()]
-        if self.request.user.is_superuser or self.request.user.groups.filter(name="admin").exists():
+        if self.request.user.is_superuser or has_role(self.request, "admin"):
             return [permissions.IsAuthenticated()]
-        if self.request.user.groups.filter(name="organizer").exists():
+        if has_role(self.request, "organizer"):
             return [permissions.IsAuthenticated(), IsOrganizerOrReadOnly()]
         return [IsAdminOrSuperUser()]
 
+    # 🔹 List dengan cursor pagination (start_time, id) dan cache berversi
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"events": serializer.data})
+        data, from_cache = cache_fetch(
+            event_list_key(request), lambda: self.load_list(request), timeout=EVENT_LIST_TIMEOUT
+        )
+        resp = Response(data)
+        resp["X-Data-Source"] = "cache" if from_cache else "db"
+        return resp
+
+    def load_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        q = request.query_params.get("q", "").strip()
+        if q:
+            # hasil pencarian diurutkan berdasarkan relevansi, hanya halaman teratas
+            events = search_events(queryset, q, self.paginator.get_page_size(request))
+            serializer = self.get_serializer(events, many=True)
+            return {"next": None, "previous": None, "events": serializer.data}
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data).data
 
     # 🔹 Detail dengan cache Redis
     def retrieve(self, request, *args, **kwargs):
-        event_id = kwargs.get("pk")
+        # key harus sama dengan str(instance.id) yang dipakai write_through/invalidate
+        try:
+            event_id = str(uuid.UUID(kwargs.get("pk")))
+        except ValueError:
+            return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
         cache_key = f"event:{event_id}"
 
-        data = cache.get(cache_key)
-        if data:
-            resp = Response(data)
-            resp["X-Data-Source"] = "cache"
-            return resp
+        def load():
+            return self.get_serializer(self.get_object()).data
 
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
+        data, from_cache = cache_fetch(cache_key, load, local=True)
+        resp = Response(data)
+        resp["X-Data-Source"] = "cache" if from_cache else "db"
+        return resp
 
-        cache.set(cache_key, data, timeout=3600)
-        return Response(data)
+    # 🔹 Write-through: cache detail diisi ulang setiap kali event disimpan
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        write_through(f"event:{instance.id}", serializer.data)
+        invalidate_event_lists()
+        return instance
 
     def perform_update(self, serializer):
+        old_quota = serializer.instance.quota
         instance = serializer.save()
-        cache.delete(f"event:{instance.id}")
+        inventory.adjust_quota(instance.quota - old_quota, event_id=instance.id)
+        write_through(f"event:{instance.id}", serializer.data)
+        invalidate_event_lists()
         return instance
 
     def perform_destroy(self, instance):
-        cache.delete(f"event:{instance.id}")
+        invalidate(f"event:{instance.id}")
+        invalidate_event_lists()
+        inventory.forget(event_ids=[instance.id])
+        # tiket event ikut terhapus (CASCADE)
+        invalidate_ticket_lists(instance.id)
         return super().perform_destroy(instance)
 
+    # 🔹 Bulk: POST membuat banyak event, PATCH mengubah banyak event (dengan "id")
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        error = bulk_payload_error(request.data)
+        if error:
+            return error
+
+        if request.method == "POST":
+            events = bulk_create_events(request, request.data)
+            code = status.HTTP_201_CREATED
+        else:
+            events, previous_quota = bulk_update_events(request, request.data)
+            for event in events:
+                inventory.adjust_quota(event.quota - previous_quota[event.id], event_id=event.id)
+            invalidate(*[f"event:{event.id}" for event in events])
+            code = status.HTTP_200_OK
+        invalidate_event_lists()
+
+        app_logger.info(f"Bulk {request.method} of {len(events)} events by {request.user.username}")
+        return Response({"events": EventSerializer(events, many=True).data}, status=code)
+
     # 🔹 Upload poster
     @action(
         detail=False,
@@ -83,6 +222,10 @@ class EventViewSet(viewsets.ModelViewSet):
         parser_classes=[MultiPartParser, FormParser],
     )
     def upload(self, request):
+        # hash SHA-256 dihitung sambil body request di-stream
+        hasher = Sha256UploadHandler(request)
+        request.upload_handlers.insert(0, hasher)
+
         file_obj = request.FILES.get("image")
         event_id = request.data.get("event")
 
@@ -98,159 +241,379 @@ class EventViewSet(viewsets.ModelViewSet):
         if not mime_type or not mime_type.startswith("image/"):
             return Response({"error": "Invalid file type. Only images allowed."}, status=status.HTTP_400_BAD_REQUEST)
 
-        minio_client.put_object(
-            BUCKET_NAME,
-            file_obj.name,
-            file_obj.file,
-            length=file_obj.size,
-            content_type=mime_type,
-        )
+        media, processed = store_upload(event_id, file_obj, hasher.digests["image"], mime_type)
+        if not processed:
+            schedule_poster_processing(media.id)
+        serializer = MediaSerializer(media)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    # 🔹 Upload langsung ke MinIO, langkah 1: presigned POST policy
+    @action(detail=False, methods=["post"], url_path="upload-url")
+    def upload_url(self, request):
+        event_id = request.data.get("event")
+        filename = request.data.get("filename", "")
+        content_type = request.data.get("content_type") or mimetypes.guess_type(filename)[0]
 
-        media = Media.objects.create(image=file_obj.name, event_id=event_id)
+        if not event_id:
+            return Response({"error": "'event' ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if not content_type or not content_type.startswith("image/"):
+            return Response({"error": "Invalid file type. Only images allowed."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if not Event.objects.filter(id=event_id).exists():
+                return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
+        except DjangoValidationError:
+            return Response({"error": "Invalid 'event' ID."}, status=status.HTTP_400_BAD_REQUEST)
+
+        object_name = f"posters/{event_id}/{uuid.uuid4().hex}{mimetypes.guess_extension(content_type) or ''}"
+        data = presigned_upload(object_name, content_type, MAX_FILE_SIZE)
+        data["upload_token"] = signing.dumps(
+            {"event": str(event_id), "object": object_name}, salt=UPLOAD_TOKEN_SALT
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+    # 🔹 Upload langsung ke MinIO, langkah 2: konfirmasi dan buat Media
+    @action(detail=False, methods=["post"], url_path="upload-confirm")
+    def upload_confirm(self, request):
+        try:
+            payload = signing.loads(
+                request.data.get("upload_token", ""),
+                salt=UPLOAD_TOKEN_SALT,
+                max_age=UPLOAD_URL_EXPIRY.total_seconds() * 2,
+            )
+        except signing.BadSignature:
+            return Response({"error": "Invalid or expired upload token."}, status=status.HTTP_400_BAD_REQUEST)
+
+        object_name = payload["object"]
+        # konfirmasi ulang dengan token yang sama tidak membuat Media ganda
+        confirmed_key = f"upload:confirmed:{object_name}"
+        media_id = cache.get(confirmed_key)
+        if media_id:
+            media = Media.objects.filter(id=media_id).first()
+            if media:
+                return Response(MediaSerializer(media).data, status=status.HTTP_201_CREATED)
+
+        try:
+            stat = minio_client.stat_object(BUCKET_NAME, object_name)
+        except S3Error:
+            return Response({"error": "Uploaded file not found."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if stat.size > MAX_FILE_SIZE or not (stat.content_type or "").startswith("image/"):
+            minio_client.remove_object(BUCKET_NAME, object_name)
+            return Response({"error": "Invalid uploaded file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # hash & dedup dikerjakan process_poster agar isi file tidak melewati web worker
+        media = Media.objects.create(image=object_name, event_id=payload["event"])
+        cache.set(confirmed_key, str(media.id), timeout=UPLOAD_URL_EXPIRY.total_seconds() * 2)
+        schedule_poster_processing(media.id)
         serializer = MediaSerializer(media)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+    # 🔹 ?width=<lebar slot di client> memilih varian WebP terkecil yang cukup
     @action(detail=True, methods=["get"], url_path="poster")
     def poster(self, request, pk=None):
         event = self.get_object()
-        medias = event.media.all()
+        medias = list(event.media.all())
 
-        if not medias.exists():
+        if not medias:
             return Response([], status=status.HTTP_200_OK)
 
-        result = []
-        for media in medias:
-            try:
-                url = minio_client.presigned_get_object(BUCKET_NAME, media.image)
-            except Exception:
-                url = None
-
-            result.append(
-                {
-                    "id": str(media.id),
-                    "image": media.image,
-                    "url": url,
-                }
-            )
+        try:
+            width = int(request.query_params.get("width", 0))
+        except ValueError:
+            return Response({"error": "'width' must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(serialize_posters(medias, width), status=status.HTTP_200_OK)
+
+    # 🔹 Batch: ?ids=<event_id>,<event_id>,... satu query untuk semua poster
+    @action(detail=False, methods=["get"], url_path="posters")
+    def posters(self, request):
+        try:
+            event_ids = [uuid.UUID(i) for i in request.query_params.get("ids", "").split(",") if i.strip()]
+            width = int(request.query_params.get("width", 0))
+        except ValueError:
+            return Response({"error": "'ids' must be event IDs and 'width' an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not event_ids:
+            return Response({"error": "'ids' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(event_ids) > POSTER_BATCH_MAX:
+            return Response({"error": f"At most {POSTER_BATCH_MAX} events per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        medias = list(
+            Media.objects.filter(event_id__in=event_ids)
+            .only("id", "image", "event_id", "variants", "blurhash", "width")
+            .order_by("uploaded_at")
+        )
+        posters = serialize_posters(medias, width)
 
+        result = {str(event_id): [] for event_id in event_ids}
+        for media, poster in zip(medias, posters):
+            result[str(media.event_id)].append(poster)
         return Response(result, status=status.HTTP_200_OK)
 
 
 # =========================================================
 # TICKET VIEWSET
 # =========================================================
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    query_plans = TICKET_QUERY_PLANS
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["event"]
 
     def get_permissions(self):
+        if self.action in ["queue", "waitlist"]:
+            return [permissions.IsAuthenticated()]
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated(), IsOrganizerOfEvent()]
 
-    # 🔹 List dengan cache
+    # 🔹 List dengan cache per event (?event=), key berversi
     def list(self, request, *args, **kwargs):
-        cache_key = "tickets:list"
-        data = cache.get(cache_key)
-
-        if data:
-            resp = Response(data)
-            resp["X-Data-Source"] = "cache"
-            return resp
+        event_id = request.query_params.get("event")
+        if event_id:
+            # bentuk UUID yang sama (huruf besar/tanpa strip) harus memakai namespace yang sama
+            try:
+                event_id = uuid.UUID(event_id)
+            except ValueError:
+                return Response({"error": "Invalid 'event' ID."}, status=status.HTTP_400_BAD_REQUEST)
+        cache_key = versioned_key(ticket_list_namespace(event_id))
 
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        data = {"tickets": serializer.data}
+        def load():
+            queryset = self.filter_queryset(self.get_queryset())
+            return {"tickets": self.get_serializer(queryset, many=True).data}
 
-        cache.set(cache_key, data, timeout=3600)
-        return Response(data)
+        data, from_cache = cache_fetch(cache_key, load)
+        resp = Response(data)
+        resp["X-Data-Source"] = "cache" if from_cache else "db"
+        return resp
 
     def retrieve(self, request, *args, **kwargs):
-        ticket_id = kwargs.get("pk")
+        # key harus sama dengan str(instance.id) yang dipakai write_through/invalidate
+        try:
+            ticket_id = str(uuid.UUID(kwargs.get("pk")))
+        except ValueError:
+            return Response({"error": "Ticket not found."}, status=status.HTTP_404_NOT_FOUND)
         cache_key = f"ticket:{ticket_id}"
 
-        data = cache.get(cache_key)
-        if data:
-            resp = Response(data)
-            resp["X-Data-Source"] = "cache"
-            return resp
+        def load():
+            return self.get_serializer(self.get_object()).data
 
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-
-        cache.set(cache_key, data, timeout=3600)
-        return Response(data)
+        data, from_cache = cache_fetch(cache_key, load, local=True)
+        resp = Response(data)
+        resp["X-Data-Source"] = "cache" if from_cache else "db"
+        return resp
 
     def perform_create(self, serializer):
-        cache.delete("tickets:list")
-        return serializer.save()
+        ticket = serializer.save()
+        invalidate_ticket_lists(ticket.event_id)
+        return ticket
 
     def perform_update(self, serializer):
+        old_event_id = serializer.instance.event_id
+        old_quota = serializer.instance.quota
         instance = serializer.save()
-        cache.delete("tickets:list")
-        cache.delete(f"ticket:{instance.id}")
+        waiting_room.invalidate_queue_config(instance.id)
+        sync_ticket_state(instance, old_event_id, old_quota)
+        invalidate_ticket_lists(old_event_id, instance.event_id)
+        invalidate(f"ticket:{instance.id}")
         return instance
 
     def perform_destroy(self, instance):
-        cache.delete("tickets:list")
-        cache.delete(f"ticket:{instance.id}")
-        return super().perform_destroy(instance)
+        invalidate_ticket_lists(instance.event_id)
+        invalidate(f"ticket:{instance.id}")
+        super().perform_destroy(instance)
+        # registrasi tiket ini ikut terhapus, sisa kuota event dimuat ulang
+        inventory.forget([instance.id], [instance.event_id])
+        waiting_room.invalidate_queue_config(instance.id)
+
+    # 🔹 Bulk: POST membuat banyak tiket, PATCH mengubah banyak tiket (dengan "id")
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        error = bulk_payload_error(request.data)
+        if error:
+            return error
+
+        if request.method == "POST":
+            tickets = bulk_create_tickets(request, request.data)
+            invalidate_ticket_lists(*{ticket.event_id for ticket in tickets})
+            code = status.HTTP_201_CREATED
+        else:
+            tickets, previous = bulk_update_tickets(request, request.data)
+            for ticket in tickets:
+                sync_ticket_state(ticket, *previous[ticket.id])
+            waiting_room.invalidate_queue_config(*previous)
+            invalidate_ticket_lists(
+                *{event_id for event_id, _ in previous.values()},
+                *{ticket.event_id for ticket in tickets},
+            )
+            invalidate(*[f"ticket:{ticket.id}" for ticket in tickets])
+            code = status.HTTP_200_OK
+
+        app_logger.info(f"Bulk {request.method} of {len(tickets)} tickets by {request.user.username}")
+        return Response({"tickets": TicketSerializer(tickets, many=True).data}, status=code)
+
+    # 🔹 Waiting room: POST untuk masuk antrean, GET untuk cek posisi
+    @action(detail=True, methods=["get", "post"], url_path="queue")
+    def queue(self, request, pk=None):
+        config = waiting_room.get_queue_config(pk)
+        if config is None:
+            return Response({"error": "Ticket not found."}, status=status.HTTP_404_NOT_FOUND)
+        queue_enabled, admission_rate, sales_start = config
+        if not queue_enabled:
+            return Response({"error": "Ticket is not in queue mode."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if request.method == "POST":
+                data = waiting_room.join_queue(pk, request.user.id, admission_rate, sales_start)
+            else:
+                data = waiting_room.queue_status(pk, request.user.id, admission_rate, sales_start)
+        except waiting_room.QueueUnavailable:
+            return Response({"error": "Waiting room is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if data is None:
+            return Response({"error": "Join the queue first."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data, status=status.HTTP_200_OK)
+
+    # 🔹 Waitlist: POST daftar, GET posisi, DELETE keluar
+    @action(detail=True, methods=["get", "post", "delete"], url_path="waitlist")
+    def waitlist(self, request, pk=None):
+        ticket = self.get_object()
+
+        if request.method == "GET":
+            position = waitlist.position(ticket.id, request.user.id)
+            if position is None:
+                return Response({"error": "Not on the waitlist."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"position": position}, status=status.HTTP_200_OK)
+
+        if request.method == "DELETE":
+            if not waitlist.leave(ticket.id, request.user.id):
+                return Response({"error": "Not on the waitlist."}, status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        sold_ticket, sold_event = inventory.count_sold(ticket.id, ticket.event_id)
+        if sold_ticket < ticket.quota and sold_event < ticket.event.quota:
+            return Response({"error": "Ticket is not sold out."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            entry = waitlist.join(ticket.id, request.user.id)
+        except waitlist.AlreadyWaiting:
+            return Response({"error": "Already on the waitlist."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"id": str(entry.id), "position": waitlist.position(ticket.id, request.user.id)},
+            status=status.HTTP_201_CREATED,
+        )
 
 
 
 # =========================================================
 # REGISTRATION VIEWSET
 # =========================================================
-class RegistrationViewSet(viewsets.ModelViewSet):
+class RegistrationViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Registration.objects.all()
     serializer_class = RegistrationSerializer
+    query_plans = REGISTRATION_QUERY_PLANS
 
     def get_permissions(self):
         if self.request.method in permissions.SAFE_METHODS:
             return [permissions.IsAuthenticated(), IsOwnerOrAdminOrOrganizer()]
-        return [permissions.IsAuthenticated()]
-
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # update/destroy melepas kursi dan mempromosikan waitlist, hanya pemilik/organizer/admin
+        return [permissions.IsAuthenticated(), HasAdmissionToken(), IsOwnerOrAdminOrOrganizer()]
 
     def list(self, request, *args, **kwargs):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if request.user.is_superuser or has_role(request, "admin"):
             queryset = self.get_queryset()
-        elif request.user.groups.filter(name="organizer").exists():
-            queryset = Registration.objects.filter(ticket__event__organizer=request.user)
+        elif has_role(request, "organizer"):
+            queryset = self.get_queryset().filter(ticket__event__organizer_id=request.user.id)
         else:
-            queryset = Registration.objects.filter(user=request.user)
+            queryset = self.get_queryset().filter(user_id=request.user.id)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response({"registrations": serializer.data})
 
     def perform_create(self, serializer):
-        registration = serializer.save(user=self.request.user)
+        nonce = getattr(self.request, "admission_nonce", None)
+        if nonce:
+            try:
+                claimed = waiting_room.claim_admission_token(nonce)
+            except waiting_room.QueueUnavailable:
+                raise PermissionDenied("Waiting room is unavailable.")
+            if not claimed:
+                raise PermissionDenied("Admission token has already been used.")
+
+        # user diambil dari user_id di payload; request.user bisa berupa RoleTokenUser
+        registration = serializer.save()
         app_logger.info(f"Registration {registration.id} created by {self.request.user.username}")
         return registration
 
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        # kursi registrasi yang sudah dibatalkan sudah dikembalikan sebelumnya
+        if instance.status == Registration.ACTIVE:
+            inventory.release(instance.ticket_id, instance.ticket.event_id)
+            waitlist.schedule_promotion(instance.ticket_id)
+
+    # 🔹 Registrasi massal (group/corporate booking)
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        error = bulk_payload_error(request.data)
+        if error:
+            return error
+
+        results = bulk_register(request.data)
+        created = sum(1 for result in results if result["status"] == "created")
+        app_logger.info(f"Bulk registration by {request.user.username}: {created}/{len(results)} created")
+
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"registrations": results}, status=code)
+
 
 # =========================================================
 # PAYMENT VIEWSET
 # =========================================================
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    query_plans = PAYMENT_QUERY_PLANS
 
     def get_permissions(self):
-        if self.request.method in permissions.SAFE_METHODS:
-            return [permissions.IsAuthenticated(), IsOwnerOrAdminOrOrganizerPayment()]
-        return [permissions.IsAuthenticated()]
+        return [permissions.IsAuthenticated(), IsOwnerOrAdminOrOrganizerPayment()]
 
     def list(self, request, *args, **kwargs):
-        if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+        if request.user.is_superuser or has_role(request, "admin"):
             queryset = self.get_queryset()
-        elif request.user.groups.filter(name="organizer").exists():
-            queryset = Payment.objects.filter(registration__ticket__event__organizer=request.user)
+        elif has_role(request, "organizer"):
+            queryset = self.get_queryset().filter(registration__ticket__event__organizer_id=request.user.id)
         else:
-            queryset = Payment.objects.filter(registration__user=request.user)
+            queryset = self.get_queryset().filter(registration__user_id=request.user.id)
 
         serializer = self.get_serializer(queryset, many=True)
         return Response({"payments": serializer.data})
+
+    def perform_update(self, serializer):
+        old_status = serializer.instance.payment_status
+        with transaction.atomic():
+            payment = serializer.save()
+
+            # pembayaran gagal: registrasi dibatalkan (payment tetap tersimpan), kursi ke daftar tunggu
+            cancelled = False
+            if payment.payment_status == "failed" and old_status != "failed":
+                cancelled = Registration.objects.filter(
+                    id=payment.registration_id, status=Registration.ACTIVE
+                ).update(status=Registration.CANCELLED) == 1
+
+        if cancelled:
+            registration = payment.registration
+            app_logger.info(
+                f"Payment {payment.id} failed, cancelled registration {registration.id} "
+                f"(amount {payment.amount_paid}, method {payment.payment_method})"
+            )
+            inventory.release(registration.ticket_id, registration.ticket.event_id)
+            waitlist.schedule_promotion(registration.ticket_id)
+        return payment
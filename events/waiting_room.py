@@ -0,0 +1,120 @@
+import math
+import time
+import uuid
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django_redis import get_redis_connection
+
+from .models import Ticket
+
+QUEUE_PREFIX = "dicoevent:queue"
+QUEUE_TTL = 24 * 3600
+QUEUE_CONFIG_TIMEOUT = 30
+ADMISSION_TOKEN_SALT = "events.waiting_room"
+ADMISSION_TOKEN_MAX_AGE = 600  # detik
+
+
+class QueueUnavailable(Exception):
+    pass
+
+
+def queue_key(ticket_id):
+    return f"{QUEUE_PREFIX}:ticket:{ticket_id}"
+
+
+def queue_config_key(ticket_id):
+    return f"ticket:{ticket_id}:queue:v2"
+
+
+def get_queue_config(ticket_id):
+    # (queue_enabled, admission_rate, sales_start), di-cache agar POST registrasi tidak query ticket
+    def load():
+        return Ticket.objects.filter(id=ticket_id).values_list(
+            "queue_enabled", "admission_rate", "sales_start"
+        ).first()
+
+    try:
+        return cache.get_or_set(queue_config_key(ticket_id), load, timeout=QUEUE_CONFIG_TIMEOUT)
+    except ValidationError:
+        return None
+
+
+def invalidate_queue_config(*ticket_ids):
+    cache.delete_many([queue_config_key(ticket_id) for ticket_id in ticket_ids])
+
+
+def _redis_client():
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        raise QueueUnavailable()
+
+
+def _status(ticket_id, user_id, rank, opened_at, admission_rate, sales_start):
+    # jam admisi mulai dari max(sales_start, join pertama): menunggu sebelum launch tidak menabung admisi
+    now = time.time()
+    opened_at = max(float(opened_at), sales_start.timestamp())
+    admitted_count = max(math.floor((now - opened_at) * admission_rate), 0)
+    ahead = max(rank - admitted_count + 1, 0)
+    status = {
+        "position": ahead,
+        "admitted": ahead == 0,
+        "retry_after": math.ceil(opened_at + (rank + 1) / admission_rate - now) if ahead else 0,
+        "admission_token": None,
+    }
+    if status["admitted"]:
+        status["admission_token"] = signing.dumps(
+            {"ticket": str(ticket_id), "user": str(user_id), "nonce": uuid.uuid4().hex}, salt=ADMISSION_TOKEN_SALT
+        )
+    return status
+
+
+def join_queue(ticket_id, user_id, admission_rate, sales_start):
+    client = _redis_client()
+    key = queue_key(ticket_id)
+    now = time.time()
+
+    pipe = client.pipeline()
+    pipe.set(f"{key}:opened", max(now, sales_start.timestamp()), nx=True, ex=QUEUE_TTL)
+    pipe.zadd(key, {str(user_id): now}, nx=True)
+    pipe.expire(key, QUEUE_TTL)
+    pipe.zrank(key, str(user_id))
+    pipe.get(f"{key}:opened")
+    _, _, _, rank, opened_at = pipe.execute()
+
+    return _status(ticket_id, user_id, rank, opened_at, admission_rate, sales_start)
+
+
+def queue_status(ticket_id, user_id, admission_rate, sales_start):
+    client = _redis_client()
+    key = queue_key(ticket_id)
+
+    pipe = client.pipeline()
+    pipe.zrank(key, str(user_id))
+    pipe.get(f"{key}:opened")
+    rank, opened_at = pipe.execute()
+    if rank is None or opened_at is None:
+        return None
+
+    return _status(ticket_id, user_id, rank, opened_at, admission_rate, sales_start)
+
+
+def verify_admission_token(token, ticket_id, user_id):
+    """Return the token payload when it is valid for ``ticket_id`` and ``user_id``, else ``None``."""
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=ADMISSION_TOKEN_SALT, max_age=ADMISSION_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if payload.get("ticket") != str(ticket_id) or payload.get("user") != str(user_id) or not payload.get("nonce"):
+        return None
+    return payload
+
+
+def claim_admission_token(nonce):
+    # token sekali pakai: nonce diklaim atomik, replay dalam max_age ditolak
+    client = _redis_client()
+    return bool(client.set(f"{QUEUE_PREFIX}:admission:{nonce}", 1, nx=True, ex=ADMISSION_TOKEN_MAX_AGE))
@@ -0,0 +1,128 @@
+from django.db import IntegrityError
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .models import WaitlistEntry
+from DicoEvent.logging_config import app_logger
+
+WAITLIST_PREFIX = "dicoevent:waitlist"
+
+
+class AlreadyWaiting(Exception):
+    pass
+
+
+def waitlist_key(ticket_id):
+    return f"{WAITLIST_PREFIX}:ticket:{ticket_id}"
+
+
+def _redis_client():
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def _push(entry):
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.zadd(waitlist_key(entry.ticket_id), {str(entry.id): entry.created_at.timestamp()})
+    except RedisError as e:
+        app_logger.error(f"Failed to push waitlist entry {entry.id} to Redis: {str(e)}")
+
+
+def join(ticket_id, user_id):
+    try:
+        entry = WaitlistEntry.objects.create(ticket_id=ticket_id, user_id=user_id)
+    except IntegrityError:
+        raise AlreadyWaiting()
+    _push(entry)
+    return entry
+
+
+def leave(ticket_id, user_id):
+    entry = WaitlistEntry.objects.filter(
+        ticket_id=ticket_id, user_id=user_id, status=WaitlistEntry.WAITING
+    ).first()
+    if entry is None:
+        return False
+    entry.status = WaitlistEntry.CANCELED
+    entry.save(update_fields=["status"])
+
+    client = _redis_client()
+    if client is not None:
+        try:
+            client.zrem(waitlist_key(ticket_id), str(entry.id))
+        except RedisError as e:
+            app_logger.error(f"Failed to remove waitlist entry {entry.id} from Redis: {str(e)}")
+    return True
+
+
+def position(ticket_id, user_id):
+    entry = WaitlistEntry.objects.filter(
+        ticket_id=ticket_id, user_id=user_id, status=WaitlistEntry.WAITING
+    ).only("id", "created_at").first()
+    if entry is None:
+        return None
+
+    client = _redis_client()
+    if client is not None:
+        try:
+            rank = client.zrank(waitlist_key(ticket_id), str(entry.id))
+            if rank is not None:
+                return rank + 1
+        except RedisError:
+            pass
+    return WaitlistEntry.objects.filter(
+        ticket_id=ticket_id, status=WaitlistEntry.WAITING, created_at__lte=entry.created_at
+    ).count()
+
+
+def _claim(entry_id):
+    # hanya satu worker yang berhasil mengubah waiting -> promoted
+    return WaitlistEntry.objects.filter(id=entry_id, status=WaitlistEntry.WAITING).update(
+        status=WaitlistEntry.PROMOTED
+    ) == 1
+
+
+def pop_next(ticket_id):
+    """Claim the oldest waiting entry for ``ticket_id`` (Redis ZPOPMIN, PostgreSQL as backup)."""
+    client = _redis_client()
+    if client is not None:
+        try:
+            while True:
+                popped = client.zpopmin(waitlist_key(ticket_id))
+                if not popped:
+                    break
+                entry_id = popped[0][0].decode()
+                if _claim(entry_id):
+                    return WaitlistEntry.objects.get(id=entry_id)
+        except RedisError as e:
+            app_logger.error(f"Redis waitlist unavailable, falling back to database: {str(e)}")
+
+    # Redis kosong/hilang: entry tertua dari index (ticket, status, created_at)
+    while True:
+        entry_id = WaitlistEntry.objects.filter(
+            ticket_id=ticket_id, status=WaitlistEntry.WAITING
+        ).order_by("created_at").values_list("id", flat=True).first()
+        if entry_id is None:
+            return None
+        if _claim(entry_id):
+            return WaitlistEntry.objects.get(id=entry_id)
+
+
+def requeue(entry):
+    # promosi gagal (kuota sudah terisi lagi), kembalikan ke posisi semula
+    WaitlistEntry.objects.filter(id=entry.id).update(status=WaitlistEntry.WAITING)
+    _push(entry)
+
+
+def schedule_promotion(ticket_id):
+    from .tasks import promote_waitlist
+
+    try:
+        promote_waitlist.delay(str(ticket_id))
+    except Exception as e:
+        app_logger.error(f"Failed to schedule waitlist promotion for ticket {ticket_id}: {str(e)}")
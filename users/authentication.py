@@ -0,0 +1,29 @@
+import uuid
+
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .roles import get_role_version
+
+
+class RoleTokenUser(TokenUser):
+    @cached_property
+    def id(self):
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+    @cached_property
+    def roles(self):
+        return frozenset(self.token.get("roles", []))
+
+
+class StatelessRoleJWTAuthentication(JWTStatelessUserAuthentication):
+    # user dibangun dari klaim token, tanpa query ke tabel users/groups
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if validated_token.get("role_version") != get_role_version(user.id):
+            raise InvalidToken(_("Token roles are outdated, please refresh the token."))
+        return user
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .roles import has_role
 
 class UserPermission(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -11,7 +12,7 @@ class UserPermission(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
-        if request.user.groups.filter(name="admin").exists():
+        if has_role(request, "admin"):
             return view.action in ["list", "retrieve"]
 
         if view.action in ["retrieve", "update", "partial_update", "destroy"]:
@@ -23,8 +24,8 @@ class UserPermission(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
-        if request.user.groups.filter(name="admin").exists():
+        if has_role(request, "admin"):
             return view.action in ["retrieve"]
 
-        return obj == request.user
+        return obj.id == request.user.id
 
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+
+ROLE_CACHE_TIMEOUT = 60  # detik
+
+
+def role_cache_key(user_id):
+    return f"user:{user_id}:roles"
+
+
+def role_version_key(user_id):
+    return f"user:{user_id}:role_version"
+
+
+def get_role_version(user_id):
+    return cache.get(role_version_key(user_id), 0)
+
+
+def get_roles(request):
+    # nama group user, dimuat sekali per request lalu disimpan di request
+    roles = getattr(request, "_user_roles", None)
+    if roles is not None:
+        return roles
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        roles = frozenset()
+    elif getattr(user, "roles", None) is not None:
+        # RoleTokenUser: role sudah ada di klaim JWT
+        roles = frozenset(user.roles)
+    else:
+        cache_key = role_cache_key(user.id)
+        names = cache.get(cache_key)
+        if names is None:
+            names = list(user.groups.values_list("name", flat=True))
+            cache.set(cache_key, names, timeout=ROLE_CACHE_TIMEOUT)
+        roles = frozenset(names)
+
+    request._user_roles = roles
+    return roles
+
+
+def has_role(request, name):
+    return name in get_roles(request)
+
+
+def invalidate_roles(user_id):
+    cache.delete(role_cache_key(user_id))
+    # token lama dengan role_version sebelumnya akan ditolak dan harus di-refresh
+    version_key = role_version_key(user_id)
+    cache.add(version_key, 0, timeout=None)
+    cache.incr(version_key)
+
+
+def add_role_claims(token, user):
+    token["username"] = user.username
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token["roles"] = list(user.groups.values_list("name", flat=True))
+    token["role_version"] = get_role_version(user.id)
+    return token
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import User
+from .roles import add_role_claims
 from django.contrib.auth.models import Group
 
 class UserSerializer(serializers.ModelSerializer):
@@ -32,4 +36,24 @@ class UserSerializer(serializers.ModelSerializer):
 class GroupSerializer(serializers.ModelSerializer):
     class Meta:
         model = Group
-        fields = ['id', 'name']
\ No newline at end of file
+        fields = ['id', 'name']
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        return add_role_claims(token, user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        # klaim role di access token baru dibaca ulang dari database
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(id=refresh[api_settings.USER_ID_CLAIM]).first()
+        if user is None:
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data["access"] = str(add_role_claims(refresh.access_token, user))
+        return data
@@ -8,6 +8,7 @@ from rest_framework import status
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from .permissions import UserPermission
+from .roles import invalidate_roles
 
 # Create your views here.
 class UserViewSet(viewsets.ModelViewSet):
@@ -45,6 +46,7 @@ class AssignRoleView(APIView):
         group = get_object_or_404(Group, id=group_id)
 
         user.groups.add(group)
+        invalidate_roles(user.id)
         return Response({"message": f"User {user.username} assigned to group {group.name}"}, status=status.HTTP_201_CREATED)
 
 # class UserViewSet(viewsets.ModelViewSet):